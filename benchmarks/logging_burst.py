@@ -0,0 +1,67 @@
+"""Logging burst benchmark: time spent on the caller's thread per log record.
+
+Compares the old direct FileHandler setup with utils.logging_setup's queue
+handler for a burst of structured per-sale records.
+
+Usage: python benchmarks/logging_burst.py [--records 50000]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def burst(logger, records):
+    started = time.perf_counter()
+    for i in range(records):
+        logger.info("sale posted",
+                    extra={
+                        "collection": "0x" + "ab" * 20,
+                        "token_id": i,
+                        "channels": 3,
+                        "failed": 0
+                    })
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = logging.getLogger()
+        root.setLevel(logging.INFO)
+
+        direct = logging.FileHandler(os.path.join(tmp, "direct.log"))
+        direct.setFormatter(
+            logging.Formatter('%(asctime)s %(levelname)s: %(message)s'))
+        root.addHandler(direct)
+        direct_seconds = burst(logging.getLogger("bench"), args.records)
+        root.removeHandler(direct)
+        direct.close()
+
+        os.environ["LOG_FILE"] = os.path.join(tmp, "logs", "queued.log")
+        import config
+        config.LOG_FILE = os.environ["LOG_FILE"]
+        from utils.logging_setup import setup_logging, stop_logging
+        # Console output would dominate both sides; measure the file writer only
+        setup_logging(config.LOG_FILE, console=False)
+        queued_seconds = burst(logging.getLogger("bench"), args.records)
+        flush_started = time.perf_counter()
+        stop_logging()
+        flush_seconds = time.perf_counter() - flush_started
+
+    per = 1e6 / args.records
+    print(f"records:            {args.records}")
+    print(f"direct FileHandler: {direct_seconds * per:.1f}us/record on caller")
+    print(f"QueueHandler:       {queued_seconds * per:.1f}us/record on caller "
+          f"(background flush {flush_seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
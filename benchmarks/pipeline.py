@@ -0,0 +1,184 @@
+"""Offline pipeline benchmarks against a synthetic chain and stub Discord.
+
+Scenarios:
+  idle     - 10 collections, no transfers
+  steady   - 10 collections, 20 independent sales each
+  sweep    - 1 collection, 1000 tokens bought in a single transaction
+  mintout  - 1 collection, 5000 free mints (transfers that are not sales)
+  erc1155  - 1 collection, 200 paid ERC-1155 TransferBatch logs of 5 tokens each
+
+Reports sales/sec, RPC calls per sale, peak traced memory and the worst event
+loop lag seen while the poll ran, and exits non-zero if a scenario detects or
+posts a different number of sales than EXPECTED.
+
+Usage: python benchmarks/pipeline.py [scenario ...] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from utils.logging_setup import setup_logging  # noqa: E402
+
+ZERO = "0x" + "00" * 20
+SELLER = "0x" + "11" * 20
+BUYER = "0x" + "22" * 20
+HEAD = 10_000
+
+
+def collection_address(i):
+    return "0x" + format(0xC0FFEE00 + i, "040x")
+
+
+def tracked(collections, channels_per_collection=2):
+    return {
+        "abstract": {
+            address: {
+                "CA_or_ME": address,
+                "subscriptions": [{
+                    "guild_id": 1,
+                    "channel_id": 1000 + n,
+                    "sales_threshold": 1
+                } for n in range(channels_per_collection)]
+            }
+            for address in collections
+        }
+    }
+
+
+def build_idle(chain):
+    return [collection_address(i) for i in range(10)]
+
+
+def build_steady(chain):
+    collections = [collection_address(i) for i in range(10)]
+    for c, address in enumerate(collections):
+        for n in range(20):
+            chain.add_transfer(address, c * 100 + n, SELLER, BUYER, 10**17,
+                               HEAD - 9 + n % 10)
+    return collections
+
+
+def build_sweep(chain):
+    address = collection_address(0)
+    tx_hash = None
+    for token_id in range(1000):
+        tx_hash = chain.add_transfer(address, token_id, SELLER, BUYER,
+                                     10**18 * 50, HEAD - 1, tx_hash)
+    return [address]
+
+
+def build_mintout(chain):
+    address = collection_address(0)
+    for token_id in range(5000):
+        chain.add_transfer(address, token_id, ZERO, BUYER, 0,
+                           HEAD - 9 + token_id % 10)
+    return [address]
+
+
+def build_erc1155(chain):
+    address = collection_address(0)
+    for n in range(200):
+        token_ids = list(range(n * 5, n * 5 + 5))
+        chain.add_transfer_batch(address, token_ids, [2] * 5, SELLER, BUYER,
+                                 10**17, HEAD - 9 + n % 10)
+    return [address]
+
+
+# scenario -> (sales, posts); every collection is tracked in 2 channels
+EXPECTED = {
+    "idle": (0, 0),
+    "steady": (200, 400),
+    "sweep": (1000, 2000),
+    "mintout": (0, 0),
+    "erc1155": (1000, 2000),
+}
+
+SCENARIOS = {
+    "idle": build_idle,
+    "steady": build_steady,
+    "sweep": build_sweep,
+    "mintout": build_mintout,
+    "erc1155": build_erc1155,
+}
+
+
+async def run_scenario(name, polls=1):
+    from utils import metrics
+    from utils.loop_monitor import LoopMonitor
+    from utils.replay import SyntheticChain, StubBot, offline_api
+
+    chain = SyntheticChain(head=HEAD)
+    collections = SCENARIOS[name](chain)
+    chain.head = HEAD
+    stub_bot = StubBot()
+
+    tracemalloc.start()
+    api = offline_api(chain, stub_bot, tracked(collections))
+    detected_before = metrics.SALES_DETECTED.total()
+    monitor = LoopMonitor(interval=0.01, threshold=3600)
+    monitor.start()
+    await asyncio.sleep(0.02)
+
+    started = time.perf_counter()
+    for _ in range(polls):
+        await api.fallback_poll_sales()
+    elapsed = time.perf_counter() - started
+
+    await asyncio.sleep(0.02)
+    monitor.stop()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sales = metrics.SALES_DETECTED.total() - detected_before
+    rpc_calls = sum(chain.calls.values())
+    return {
+        "scenario": name,
+        "logs": len(chain.logs),
+        "sales": int(sales),
+        "posts": len(stub_bot.sent),
+        "seconds": round(elapsed, 3),
+        "sales_per_sec": round(sales / elapsed, 1) if sales else 0.0,
+        "rpc_calls": rpc_calls,
+        "rpc_per_sale": round(rpc_calls / sales, 2) if sales else None,
+        "peak_mem_mb": round(peak / 1e6, 2),
+        "max_loop_lag_ms": round(monitor.max_lag * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS))
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    setup_logging(None, console=False)
+    results = [asyncio.run(run_scenario(name)) for name in args.scenarios]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        columns = list(results[0])
+        print("  ".join(f"{c:>15}" for c in columns))
+        for result in results:
+            print("  ".join(f"{str(result[c]):>15}" for c in columns))
+
+    wrong = [
+        f"{r['scenario']}: {r['sales']} sales / {r['posts']} posts, expected "
+        f"{EXPECTED[r['scenario']][0]} / {EXPECTED[r['scenario']][1]}"
+        for r in results
+        if (r["sales"], r["posts"]) != EXPECTED[r["scenario"]]
+    ]
+    if wrong:
+        sys.exit("Unexpected results:\n" + "\n".join(wrong))
+
+
+if __name__ == "__main__":
+    main()
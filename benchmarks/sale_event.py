@@ -0,0 +1,94 @@
+"""Memory and allocation cost of decoding a mint-out burst of Transfer logs.
+
+Compares the previous path (eth.get_logs into web3 AttributeDicts with
+HexBytes topics, then hex strings per field) with get_transfer_logs
+decoding each raw log once into a SaleEvent.
+
+Usage: python benchmarks/sale_event.py [--logs 20000]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from web3 import Web3  # noqa: E402
+
+from utils.api_handler import AbstractAPI  # noqa: E402
+from utils.replay import SyntheticChain  # noqa: E402
+
+ZERO = "0x" + "00" * 20
+BUYER = "0x" + "22" * 20
+COLLECTION = Web3.to_checksum_address("0x" + "ab" * 20)
+
+
+def legacy_decode(api, from_block, to_block):
+    """The pre-SaleEvent path: web3-formatted logs plus hex strings per field."""
+    logs = api.w3_http.eth.get_logs({
+        "fromBlock": from_block,
+        "toBlock": to_block,
+        "address": COLLECTION
+    })
+    decoded = []
+    for event in logs:
+        decoded.append((event, int(event["topics"][3].hex(), 16),
+                        "0x" + event["topics"][1].hex()[-40:],
+                        "0x" + event["topics"][2].hex()[-40:],
+                        event["transactionHash"].hex()))
+    return decoded
+
+
+def compact_decode(api, from_block, to_block):
+    return api.get_transfer_logs(COLLECTION, from_block, to_block)
+
+
+def measure(decode, api, from_block, to_block, count):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    batch = decode(api, from_block, to_block)
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count
+                 for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    assert len(batch) == count
+    del batch
+    return {
+        "us_per_log": elapsed / count * 1e6,
+        "peak_bytes_per_log": peak / count,
+        "retained_bytes_per_log": retained / count,
+        "live_blocks_per_log": blocks / count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logs", type=int, default=20_000)
+    args = parser.parse_args()
+
+    chain = SyntheticChain(head=1000)
+    for token_id in range(args.logs):
+        chain.add_transfer(COLLECTION, token_id, ZERO, BUYER, 0,
+                           1000 - token_id % 10, "0x" + "ee" * 32)
+    api = AbstractAPI(http_provider=chain,
+                      tracked_collections={"abstract": {}})
+
+    print(f"{args.logs} mint Transfer logs")
+    print(f"{'path':>10}  {'us/log':>8}  {'peak B/log':>10}  "
+          f"{'retained B/log':>14}  {'live blocks/log':>15}")
+    for name, decode in (("legacy", legacy_decode),
+                         ("compact", compact_decode)):
+        result = measure(decode, api, 990, 1000, args.logs)
+        print(f"{name:>10}  {result['us_per_log']:>8.1f}  "
+              f"{result['peak_bytes_per_log']:>10.0f}  "
+              f"{result['retained_bytes_per_log']:>14.0f}  "
+              f"{result['live_blocks_per_log']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
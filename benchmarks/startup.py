@@ -0,0 +1,71 @@
+"""Cold-start benchmark: time from interpreter start to all cogs loaded.
+
+Runs the bot's import and cog loading (no Discord connection) in fresh
+interpreters and reports the median, plus the slowest imports of the last run.
+
+Usage: python benchmarks/startup.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import asyncio, sys, time
+started = time.perf_counter()
+import main
+asyncio.run(main.load_commands())
+print(f"STARTUP_MS={(time.perf_counter() - started) * 1000:.1f}")
+print(f"WEB3_IMPORTED={'web3' in sys.modules}")
+from utils import startup_profile
+print(startup_profile.report())
+"""
+
+
+def run_once():
+    env = dict(os.environ,
+               STARTUP_PROFILE="1",
+               APPLICATION_ID=os.getenv("APPLICATION_ID", "1"),
+               PYTHONDONTWRITEBYTECODE="1")
+    os.makedirs(os.path.join(ROOT, "data", "logs"), exist_ok=True)
+    wall_started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", SNIPPET],
+                            cwd=ROOT,
+                            env=env,
+                            capture_output=True,
+                            text=True,
+                            check=True)
+    wall_ms = (time.perf_counter() - wall_started) * 1000
+    values = dict(
+        line.split("=", 1) for line in result.stdout.splitlines()
+        if line.startswith(("STARTUP_MS=", "WEB3_IMPORTED=")))
+    return wall_ms, float(values["STARTUP_MS"]), values[
+        "WEB3_IMPORTED"], result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    walls, startups = [], []
+    for _ in range(args.runs):
+        wall_ms, startup_ms, web3_imported, output = run_once()
+        walls.append(wall_ms)
+        startups.append(startup_ms)
+
+    print(f"runs:                {args.runs}")
+    print(f"process wall (median): {statistics.median(walls):.1f}ms")
+    print(f"import + cogs (median): {statistics.median(startups):.1f}ms")
+    print(f"web3 imported at startup: {web3_imported}")
+    print()
+    print("\n".join(line for line in output.splitlines()
+                    if not line.startswith(("STARTUP_MS=", "WEB3_IMPORTED="))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+import config
+from utils.backfill import Backfill, load_checkpoint
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillSales(commands.Cog):
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.api = None
+        self.tasks = {}  # collection -> running backfill task
+
+    async def get_api(self):
+        if self.api is None:
+            from utils.api_handler import AbstractAPI
+            self.api = await asyncio.to_thread(AbstractAPI)
+        return self.api
+
+    @commands.command(name="backfill")
+    @commands.is_owner()
+    async def backfill(self,
+                       ctx,
+                       collection_address: str,
+                       blocks: int = 10000,
+                       channel: discord.TextChannel = None):
+        """Load historical sales for a collection (prefix command).
+
+        Usage: !backfill <collection_address> [blocks] [#summary-channel]
+        Resumes an unfinished backfill of the same collection if one was checkpointed.
+        """
+        collection_address = collection_address.lower()
+        running = self.tasks.get(collection_address)
+        if running and not running.done():
+            await ctx.send(f"⏳ A backfill of `{collection_address}` is already running.")
+            return
+
+        try:
+            api = await self.get_api()
+            checkpoint = load_checkpoint(collection_address)
+            kwargs = {
+                "concurrency": config.BACKFILL_CONCURRENCY,
+                "max_chunk": config.BACKFILL_MAX_CHUNK
+            }
+            if checkpoint:
+                job = Backfill.resume(api, checkpoint, **kwargs)
+                await ctx.send(
+                    f"🔁 Resuming backfill of `{collection_address}` from block {checkpoint['next_block']} "
+                    f"to {checkpoint['to_block']}.")
+            else:
+                head = await asyncio.to_thread(
+                    lambda: api.w3_http.eth.block_number)
+                job = Backfill(api, collection_address, max(0, head - blocks),
+                               head, **kwargs)
+                await ctx.send(
+                    f"🔎 Backfilling `{collection_address}` over the last {blocks} blocks.")
+        except Exception as e:
+            logger.error(f"Error starting backfill: {str(e)}")
+            await ctx.send(f"❌ Error: {str(e)}")
+            return
+
+        self.tasks[collection_address] = asyncio.create_task(
+            self.run_backfill(ctx, job, channel))
+
+    async def run_backfill(self, ctx, job, channel):
+        """Run a backfill in the background and report the outcome."""
+        try:
+            result = await job.run()
+        except Exception as e:
+            logger.error(f"Backfill of {job.collection} stopped: {str(e)}")
+            await ctx.send(
+                f"❌ Backfill of `{job.collection}` stopped at block {job.checkpoint['next_block']}: {str(e)}. "
+                f"Run the command again to resume.")
+            return
+
+        summary = (
+            f"✅ Backfill of `{job.collection}` complete: {result['sales_found']} sales, "
+            f"{result['volume']} ABS volume over blocks {result['from_block']}-{result['to_block']} "
+            f"in {result['elapsed']:.0f}s.")
+        await ctx.send(summary)
+        if channel:
+            await channel.send(summary)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(BackfillSales(bot))
+    logger.info("Backfill command loaded")
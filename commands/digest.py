@@ -0,0 +1,76 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+import logging
+from utils.subscriptions import (lock, load_tracked_collections,
+                                 save_tracked_collections, set_digest)
+
+logger = logging.getLogger(__name__)
+
+
+class Digest(commands.Cog):
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(
+        name="digest",
+        description="Post a daily or weekly sales digest for a tracked collection")
+    @app_commands.choices(frequency=[
+        app_commands.Choice(name="Daily", value="daily"),
+        app_commands.Choice(name="Weekly", value="weekly"),
+        app_commands.Choice(name="Off", value="off")
+    ])
+    @app_commands.checks.cooldown(1, 2.0)  # 1 use every 2 seconds
+    async def digest(self,
+                     interaction: discord.Interaction,
+                     collection_address: str,
+                     channel: discord.TextChannel,
+                     frequency: app_commands.Choice[str]):
+        """Command to schedule a digest of a collection's sales in a channel.
+
+        Args:
+            interaction: The Discord interaction triggering the command.
+            collection_address: The address of an Abstract NFT collection tracked in the channel.
+            channel: The channel tracking the collection, where the digest is posted.
+            frequency: Daily (after midnight UTC), weekly (after Monday 00:00 UTC) or off.
+        """
+        try:
+            await interaction.response.defer(ephemeral=True)
+
+            collection_address = collection_address.lower()
+            value = None if frequency.value == "off" else frequency.value
+
+            async with lock:  # Use lock for thread-safe JSON access
+                tracked_collections = load_tracked_collections(
+                    self.bot.get_channel)
+                if not set_digest(tracked_collections, collection_address,
+                                  channel.id, value):
+                    logger.warning(
+                        f"Failed to set digest for {collection_address}: Not tracked in {channel.id}"
+                    )
+                    await interaction.followup.send(
+                        f"❌ **{collection_address}** is not tracked in {channel.mention}. Use /start_track first.",
+                        ephemeral=True)
+                    return
+                save_tracked_collections(tracked_collections)
+
+            logger.info(
+                f"Digest for {collection_address} in channel {channel.id} set to {frequency.value}")
+            if value:
+                await interaction.followup.send(
+                    f"✅ {frequency.name} digest of **{collection_address}** will be posted in {channel.mention}.",
+                    ephemeral=True)
+            else:
+                await interaction.followup.send(
+                    f"✅ Digest of **{collection_address}** in {channel.mention} turned off.",
+                    ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in digest: {str(e)}")
+            await interaction.followup.send(
+                "❌ An error occurred while processing the command.",
+                ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Digest(bot))
@@ -2,12 +2,8 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import logging
+from utils.loop_monitor import monitor as loop_monitor
 
-# Set up logging to match main.py
-logging.basicConfig(filename='./data/logs/bot.log',
-                    level=logging.INFO,
-                    format='%(asctime)s %(levelname)s: %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 
 class Ping(commands.Cog):
@@ -18,14 +14,15 @@ class Ping(commands.Cog):
     async def ping(self, interaction: discord.Interaction):
         """Simple ping command to check bot responsiveness"""
         try:
-            # Calculate bot latency
+            # Calculate bot latency and how far behind the event loop is running
             latency = round(self.bot.latency * 1000)
-            logger.info(f"Ping command used by {interaction.user} with latency {latency}ms")
+            loop_lag = await loop_monitor.measure_lag() * 1000
+            logger.info(f"Ping command used by {interaction.user} with latency {latency}ms, loop lag {loop_lag:.1f}ms")
 
-            await interaction.response.send_message(
-                f"🏓 Pong! Bot latency is {latency}ms", 
-                ephemeral=True
-            )
+            message = f"🏓 Pong! Bot latency is {latency}ms, event loop lag is {loop_lag:.1f}ms"
+            if loop_monitor.running:
+                message += f" (max {loop_monitor.max_lag * 1000:.0f}ms, {loop_monitor.stalls} stalls)"
+            await interaction.response.send_message(message, ephemeral=True)
         except Exception as e:
             logger.error(f"Error in ping command: {str(e)}")
             await interaction.response.send_message(
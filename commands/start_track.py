@@ -1,21 +1,13 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
-import asyncio
 import logging
+from utils.subscriptions import (lock, load_tracked_collections,
+                                 save_tracked_collections, add_subscription,
+                                 get_subscriptions)
 
-# Set up logging to match main.py
-logging.basicConfig(filename='./data/logs/bot.log',
-                    level=logging.INFO,
-                    format='%(asctime)s %(levelname)s: %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 
-DATA_FILE = "./data/tracked_collections.json"
-lock = asyncio.Lock()  # Thread-safe file access
-
 
 class StartSale(commands.Cog):
 
@@ -25,6 +17,7 @@ class StartSale(commands.Cog):
     @app_commands.command(
         name="start_track",
         description="Start tracking NFT sales for an Abstract collection")
+    @app_commands.guild_only()
     @app_commands.checks.cooldown(1, 2.0)  # 1 use every 2 seconds
     async def start_track(self,
                           interaction: discord.Interaction,
@@ -36,7 +29,8 @@ class StartSale(commands.Cog):
         Args:
             interaction: The Discord interaction triggering the command.
             collection_address: The address of the Abstract NFT collection to track (e.g., '0x...').
-            channel: The Discord channel where sales notifications will be posted.
+            channel: The Discord channel where sales notifications will be posted. A collection
+                can be tracked in several channels and guilds at once.
             sales_threshold: The minimum number of sales required to trigger notifications (default: 1).
         """
         try:
@@ -51,69 +45,32 @@ class StartSale(commands.Cog):
                     "❌ Invalid collection address format.", ephemeral=True)
                 return
 
-            # Ensure Data directory exists
-            os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
+            collection_address = collection_address.lower()
+            guild_id = interaction.guild.id
 
             async with lock:  # Use lock for thread-safe JSON access
-                # Load or initialize tracked_collections with debugging
-                tracked_collections = {}
-                if os.path.exists(DATA_FILE):
-                    try:
-                        with open(DATA_FILE, "r") as file:
-                            content = file.read().strip()
-                            if content:  # Check if file has content
-                                tracked_collections = json.load(file)
-                                logger.info(
-                                    f"Loaded tracked_collections.json: {tracked_collections}"
-                                )
-                            else:
-                                # File is empty, initialize with default structure
-                                tracked_collections = {"abstract": {}}
-                                logger.warning(
-                                    f"tracked_collections.json is empty, initializing with default structure"
-                                )
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Invalid JSON in {DATA_FILE}: {e}")
-                        # Initialize with default structure if JSON is corrupted
-                        tracked_collections = {"abstract": {}}
-                else:
-                    # File doesn’t exist, initialize with default structure
-                    tracked_collections = {"abstract": {}}
-                    logger.warning(
-                        f"tracked_collections.json does not exist, initializing with default structure"
-                    )
+                tracked_collections = load_tracked_collections(
+                    self.bot.get_channel)
 
-                # Check if collection is already being tracked
-                collection_address = collection_address.lower()
-                logger.debug(
-                    f"Checking for duplicate collection: {collection_address} in {tracked_collections}"
-                )
-                if "abstract" in tracked_collections and collection_address in tracked_collections[
-                        "abstract"]:
+                # A collection may fan out to many channels, but each channel only once
+                if not add_subscription(tracked_collections, collection_address,
+                                        guild_id, channel.id,
+                                        sales_threshold):
                     logger.warning(
-                        f"Failed to track collection {collection_address}: Already tracked in {channel.mention}"
+                        f"Failed to track collection {collection_address}: Already tracked in {channel.id}"
                     )
                     await interaction.followup.send(
                         f"❌ This collection is already being tracked in {channel.mention}!",
                         ephemeral=True)
                     return
 
-                # Ensure 'abstract' exists in the JSON
-                if "abstract" not in tracked_collections:
-                    tracked_collections["abstract"] = {}
-
-                # Add the new collection tracking
-                tracked_collections["abstract"][collection_address] = {
-                    "CA_or_ME": collection_address,  # Collection address
-                    "channel_id": channel.id,
-                    "sales_threshold": sales_threshold
-                }
-
                 # Save updated data safely
-                with open(DATA_FILE, "w") as file:
-                    json.dump(tracked_collections, file, indent=4)
+                save_tracked_collections(tracked_collections)
+                subscribers = len(
+                    get_subscriptions(
+                        tracked_collections["abstract"][collection_address]))
                 logger.info(
-                    f"Successfully tracked collection {collection_address} on Abstract in channel {channel.id}"
+                    f"Successfully tracked collection {collection_address} on Abstract in channel {channel.id} ({subscribers} subscriptions)"
                 )
 
             await interaction.followup.send(
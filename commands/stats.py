@@ -0,0 +1,121 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+import logging
+from utils import metrics
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+
+def format_seconds(value):
+    return f"{value * 1000:.0f}ms" if value is not None else "n/a"
+
+
+class Stats(commands.Cog):
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="stats",
+                          description="Show sales pipeline metrics (owner only)")
+    async def stats(self, interaction: discord.Interaction):
+        """Owner-only summary of the same metrics served at /metrics."""
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message(
+                "❌ Only the bot owner can use this command.", ephemeral=True)
+            return
+
+        try:
+            embed = discord.Embed(title="📊 Sales Pipeline Stats",
+                                  color=discord.Color.blue(),
+                                  timestamp=discord.utils.utcnow())
+
+            rpc_lines = []
+            for (method, endpoint), child in sorted(
+                    metrics.RPC_CALLS.children().items(),
+                    key=lambda item: -item[1].value)[:8]:
+                latency = metrics.RPC_SECONDS.labels(method, endpoint)
+                rpc_lines.append(
+                    f"`{method}` ({endpoint}): {child.value:.0f} calls, "
+                    f"p50 {format_seconds(latency.quantile(0.5))}, "
+                    f"p95 {format_seconds(latency.quantile(0.95))}")
+            embed.add_field(name="RPC",
+                            value="\n".join(rpc_lines) or "No calls yet",
+                            inline=False)
+
+            embed.add_field(
+                name="Pipeline",
+                value=f"• **Logs ingested**: {metrics.LOGS_INGESTED.total():.0f}\n"
+                f"• **Sales detected**: {metrics.SALES_DETECTED.total():.0f}\n"
+                f"• **Sales posted**: {metrics.SALES_POSTED.total():.0f} "
+                f"({metrics.SALES_FAILED.total():.0f} failed)\n"
+                f"• **Dedup hits**: {metrics.DEDUP_HITS.total():.0f}",
+                inline=True)
+
+            send = metrics.DISCORD_SEND_SECONDS.labels()
+            waits = metrics.RATE_LIMIT_WAIT_SECONDS.labels()
+            lag = metrics.BLOCK_LAG.value()
+            embed.add_field(
+                name="Discord & Chain",
+                value=f"• **Send p50/p95**: {format_seconds(send.quantile(0.5))} / "
+                f"{format_seconds(send.quantile(0.95))}\n"
+                f"• **Rate-limit waits**: {waits.count} ({waits.sum:.1f}s total)\n"
+                f"• **Block lag**: {f'{lag:.0f} blocks' if lag is not None else 'n/a'}\n"
+                f"• **Gateway latency**: {round(self.bot.latency * 1000)}ms",
+                inline=True)
+
+            await interaction.response.send_message(embed=embed,
+                                                    ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in stats command: {str(e)}")
+            await interaction.response.send_message(
+                "❌ Something went wrong processing your request.",
+                ephemeral=True)
+
+    @app_commands.command(
+        name="latency",
+        description="Show per-stage sale detection latency (owner only)")
+    async def latency(self, interaction: discord.Interaction):
+        """Owner-only p50/p95/p99 of each pipeline span plus the latest sale's breakdown."""
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message(
+                "❌ Only the bot owner can use this command.", ephemeral=True)
+            return
+
+        try:
+            embed = discord.Embed(title="⏱️ Sale Latency Breakdown",
+                                  color=discord.Color.blue(),
+                                  timestamp=discord.utils.utcnow())
+
+            lines = []
+            for name, (count, (p50, p95, p99)) in tracing.percentiles().items():
+                lines.append(
+                    f"`{name:<8}` p50 {format_seconds(p50)} · p95 {format_seconds(p95)} · "
+                    f"p99 {format_seconds(p99)} ({count})")
+            embed.add_field(name="Per stage",
+                            value="\n".join(lines) or "No sales traced yet",
+                            inline=False)
+
+            if tracing.recent_traces:
+                latest = tracing.recent_traces[-1]
+                spans = latest.spans()
+                embed.add_field(
+                    name=f"Latest sale: {latest.collection[:6]}...{latest.collection[-4:]} #{latest.token_id}",
+                    value="\n".join(f"`{name:<8}` {format_seconds(seconds)}"
+                                    for name, seconds in spans.items())
+                    or "Incomplete trace",
+                    inline=False)
+
+            await interaction.response.send_message(embed=embed,
+                                                    ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in latency command: {str(e)}")
+            await interaction.response.send_message(
+                "❌ Something went wrong processing your request.",
+                ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Stats(bot))
+    logger.info("Stats command loaded")
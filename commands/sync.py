@@ -2,61 +2,35 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
+import asyncio
 import logging
 import aiohttp
 import config
+from utils.command_sync import sync_commands_if_changed
 
-# Set up logging
-logging.basicConfig(filename='./data/logs/bot.log',
-                    level=logging.INFO,
-                    format='%(asctime)s %(levelname)s: %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 
 class Sync(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        
+        self.soak_task = None
+
     @commands.command(name="forcesync")
     @commands.is_owner()
     async def force_sync(self, ctx):
         """Force syncs commands (prefix command)"""
         try:
             await ctx.send("Attempting to force sync commands...")
-            
-            # Clear and sync commands
-            self.bot.tree.clear_commands(guild=None)
-            
-            try:
-                synced = await self.bot.tree.sync()
-                
-                if synced:
-                    await ctx.send(f"✅ Successfully synced {len(synced)} commands globally!")
-                    logger.info(f"Force synced {len(synced)} commands")
-                else:
-                    await ctx.send("⚠️ Sync completed but returned empty results.")
-                    logger.warning("Force sync returned empty results")
-            except TypeError as e:
-                if "NoneType" in str(e):
-                    await ctx.send("⚠️ Sync returned None. Attempting manual registration...")
-                    logger.warning("Force sync returned None")
-                    
-                    # Manual registration fallback
-                    try:
-                        async with aiohttp.ClientSession() as session:
-                            headers = {'Authorization': f'Bot {config.BOT_TOKEN}', 'Content-Type': 'application/json'}
-                            command_data = {"name": "ping", "description": "Check if the bot is responsive", "type": 1}
-                            url = f'https://discord.com/api/v10/applications/{config.APPLICATION_ID}/commands'
-                            
-                            async with session.post(url, headers=headers, json=command_data) as response:
-                                if response.status == 200 or response.status == 201:
-                                    await ctx.send("✅ Manually registered ping command!")
-                                else:
-                                    error_text = await response.text()
-                                    await ctx.send(f"❌ Manual registration failed: HTTP {response.status}\n```{error_text}```")
-                    except Exception as manual_error:
-                        await ctx.send(f"❌ Manual registration error: {str(manual_error)}")
-                
+
+            # Bulk-overwrite from the loaded tree and refresh the cached fingerprint
+            synced = await sync_commands_if_changed(self.bot, force=True)
+            if synced:
+                await ctx.send(f"✅ Successfully synced {len(synced)} commands globally!")
+                logger.info(f"Force synced {len(synced)} commands")
+            else:
+                await ctx.send("⚠️ Sync completed but returned empty results.")
+                logger.warning("Force sync returned empty results")
+
             # Check API for commands
             async with aiohttp.ClientSession() as session:
                 headers = {'Authorization': f'Bot {config.BOT_TOKEN}'}
@@ -66,11 +40,52 @@ class Sync(commands.Cog):
                         await ctx.send(f"🔍 Discord API shows {len(commands)} global commands registered")
                     else:
                         await ctx.send(f"❌ Failed to check global commands: HTTP {response.status}")
-                        
+
         except Exception as e:
             logger.error(f"Error in forcesync: {str(e)}")
             await ctx.send(f"❌ Error: {str(e)}")
 
+    @commands.command(name="soak")
+    @commands.is_owner()
+    async def soak(self,
+                   ctx,
+                   duration: int = 60,
+                   collections: int = 20,
+                   channels: int = 5,
+                   rate: float = 10.0):
+        """Soak test the sales pipeline against local stub RPC and Discord servers (prefix command).
+
+        Usage: !soak [duration_seconds] [collections] [channels] [sales_per_second]
+        Nothing is sent to the real chain or to Discord channels.
+        """
+        if self.soak_task and not self.soak_task.done():
+            await ctx.send("⏳ A soak test is already running.")
+            return
+        if duration <= 0 or collections <= 0 or channels <= 0 or rate <= 0:
+            await ctx.send("❌ Duration, collections, channels and rate must be positive.")
+            return
+
+        await ctx.send(
+            f"🧪 Soak test started: {rate:g} sales/s across {collections} collections and "
+            f"{channels} channels for {duration}s.")
+        self.soak_task = asyncio.create_task(
+            self.run_soak(ctx, duration, collections, channels, rate))
+
+    async def run_soak(self, ctx, duration, collections, channels, rate):
+        """Run a soak test in the background and post its report."""
+        from utils.soak import run_soak_process, format_report
+
+        try:
+            # A child process, so the run never touches this bot's metrics, logs or caches
+            report = await run_soak_process(collections, channels, rate,
+                                            duration)
+        except Exception as e:
+            logger.error(f"Soak test failed: {str(e)}")
+            await ctx.send(f"❌ Soak test failed: {str(e)}")
+            return
+        logger.info(f"Soak test report: {report}")
+        await ctx.send(format_report(report))
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(Sync(bot))
     logger.info("Sync command loaded")
@@ -1,21 +1,11 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
-import asyncio
 import logging
+from utils.subscriptions import lock, load_tracked_collections, get_channel_ids
 
-# Set up logging to match main.py
-logging.basicConfig(filename='./data/logs/bot.log',
-                    level=logging.INFO,
-                    format='%(asctime)s %(levelname)s: %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 
-DATA_FILE = "./data/tracked_collections.json"
-lock = asyncio.Lock()  # Thread-safe file access
-
 class TrackedCollections(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -27,14 +17,8 @@ class TrackedCollections(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            if not os.path.exists(DATA_FILE):
-                await interaction.followup.send(
-                    "No collections are currently being tracked.", ephemeral=True)
-                return
-
             async with lock:
-                with open(DATA_FILE, 'r') as f:
-                    data = json.load(f)
+                data = load_tracked_collections()
 
             abstract_collections = data.get("abstract", {})
 
@@ -57,19 +41,16 @@ class TrackedCollections(commands.Cog):
                 embed.set_footer(text=footer_text)
 
                 for collection_address, data in abstract_collections.items():
-                    channel_id = data.get("channel_id")
-                    channel = None
-
-                    if self.bot and channel_id:
-                        channel = self.bot.get_channel(channel_id)
-
-                    channel_mention = f"<#{channel_id}>" if channel_id else "No channel set"
+                    channel_ids = get_channel_ids(data)
+                    channel_mention = ", ".join(
+                        f"<#{channel_id}>" for channel_id in
+                        channel_ids) if channel_ids else "No channel set"
 
                     # Collection data display
                     embed.add_field(
                         name=f"Collection: {data.get('name', 'Unknown')}",
                         value=f"• **Address**: `{collection_address}`\n"
-                              f"• **Channel**: {channel_mention}\n"
+                              f"• **Channels**: {channel_mention}\n"
                               f"• **Floor Price**: {data.get('floor_price', 'N/A')} ABS\n"
                               f"• **Last Sale**: {data.get('last_sale', 'N/A')} ABS\n"
                               f"• **Sales Today**: {data.get('sales_today', 0)}\n"
@@ -7,6 +7,26 @@ APPLICATION_ID = int(os.getenv('APPLICATION_ID', '0'))
 GUILD_ID = int(os.getenv('GUILD_ID', '0')) if os.getenv('GUILD_ID') else None  # Optional for global sync
 ABSTRACT_WS_RPC = os.getenv('ABSTRACT_WS_RPC', 'wss://api.mainnet.abs.xyz/ws')
 ABSTRACT_HTTP_RPC = os.getenv('ABSTRACT_HTTP_RPC', 'https://abstract.rpc.thirdweb.com')
+DISCORD_API_BASE = os.getenv('DISCORD_API_BASE', 'https://discord.com/api/v10')  # Point at a stub for local testing
+SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', '2'))  # Posting processes in sharded mode
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', '4'))  # Parallel getLogs chunks
+BACKFILL_MAX_CHUNK = int(os.getenv('BACKFILL_MAX_CHUNK', '50000'))  # Largest block range per getLogs
+LOG_FILE = os.getenv('LOG_FILE', './data/logs/bot.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_JSON = os.getenv('LOG_JSON', '0') == '1'  # JSON lines instead of plain text
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # Rotate bot.log at 10 MB
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))  # 0 disables the /metrics endpoint
+LOOP_MONITOR_ENABLED = os.getenv('LOOP_MONITOR_ENABLED', '0') == '1'  # Event loop lag watchdog
+LOOP_MONITOR_INTERVAL_MS = int(os.getenv('LOOP_MONITOR_INTERVAL_MS', '100'))
+LOOP_LAG_THRESHOLD_MS = int(os.getenv('LOOP_LAG_THRESHOLD_MS', '250'))  # Stall length that captures a stack
+RPC_RECORD_FILE = os.getenv('RPC_RECORD_FILE')  # Record RPC responses and Discord sends to this fixture
+RESUME_MAX_BLOCKS = int(os.getenv('RESUME_MAX_BLOCKS', '10000'))  # Furthest back polling resumes from a checkpoint
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '15'))  # Seconds to drain in-flight sales on shutdown
+NAME_SERVICE_RESOLVER = os.getenv('NAME_SERVICE_RESOLVER')  # ENS-style reverse resolver contract; unset disables name lookups
+LABEL_CACHE_SIZE = int(os.getenv('LABEL_CACHE_SIZE', '10000'))  # Wallets kept in the label LRU
+LABEL_WAIT_MS = int(os.getenv('LABEL_WAIT_MS', '150'))  # Longest a post waits on a wallet's first name lookup
 
 # Debugging output but don't expose the full token
 if BOT_TOKEN:
@@ -1,4 +1,7 @@
 
+from utils import startup_profile
+startup_profile.install()  # Times every import below when STARTUP_PROFILE=1
+
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -6,30 +9,20 @@ import config
 import os
 import asyncio
 from utils.sales_posting import monitor_sales
+from utils.digests import run_digests
+from utils.command_sync import sync_commands_if_changed
+from utils.logging_setup import setup_logging
+from utils.metrics import start_metrics_server, install_discord_rate_limit_hook
+from utils.loop_monitor import monitor as loop_monitor
+from utils.lifecycle import manager as lifecycle, install_signal_handlers
 import logging
-import aiohttp  # For checking Discord API status
 
-# Set up logging to both file and console with a clean format
-logging.basicConfig(
-    filename='./data/logs/bot.log',
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Set up logging once for every module: file (rotating) and console, written
+# by a background thread so log I/O never blocks the event loop
+setup_logging()
+install_discord_rate_limit_hook()
 logger = logging.getLogger(__name__)
 
-# Configure discord.py logging to show purple messages in console
-discord_logger = logging.getLogger('discord')
-discord_logger.setLevel(logging.INFO)
-discord_handler = logging.StreamHandler()
-discord_handler.setFormatter(logging.Formatter('%(asctime)s %(name)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', style='%'))
-discord_logger.addHandler(discord_handler)
-
-# Add console handler for custom logs with the same format
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', style='%'))
-logger.addHandler(console_handler)
-
 # Enable bot with all necessary intents
 intents = discord.Intents.all()
 intents.message_content = True
@@ -50,124 +43,27 @@ except ValueError as e:
     logger.error(f"Invalid APPLICATION_ID: {str(e)}")
     raise ValueError("APPLICATION_ID must be a valid integer") from e
 
-# Load all commands from /commands folder, handling renamed tracked_collectionsout.py
-async def load_commands():
-    for filename in os.listdir("./commands"):
-        if filename.endswith(".py") and filename not in ["tracked_collections.py", "tracked_collectionsout.py"]:
-            try:
-                await bot.load_extension(f"commands.{filename[:-3]}")
-                logger.info(f"Loaded {filename}")
-            except Exception as e:
-                logger.error(f"Failed to load {filename}: {str(e)}")
-        elif filename == "tracked_collectionsout.py":
-            try:
-                await bot.load_extension(f"commands.{filename[:-3]}")
-                logger.info(f"Loaded {filename} (renamed tracked_collections)")
-            except Exception as e:
-                logger.error(f"Failed to load {filename}: {str(e)}")
+commands_registered = False  # Set after the first on_ready registration check
 
-async def check_discord_api_status():
-    """Check Discord API status to debug potential issues."""
-    async with aiohttp.ClientSession() as session:
+async def load_extension(filename):
+    """Load a single cog from /commands, timing it in startup profile mode."""
+    with startup_profile.timed(f"load commands.{filename[:-3]}"):
         try:
-            # Check basic API connectivity
-            async with session.get('https://discord.com/api/v10') as response:
-                if response.status == 200:
-                    logger.info("Discord API is reachable")
-                else:
-                    logger.error(f"Discord API status: {response.status}")
-
-            # Check application commands endpoint with the bot token
-            headers = {'Authorization': f'Bot {config.BOT_TOKEN}'}
-            async with session.get(f'https://discord.com/api/v10/applications/{config.APPLICATION_ID}/commands', headers=headers) as response:
-                if response.status == 200:
-                    commands = await response.json()
-                    logger.info(f"Bot has {len(commands)} global commands registered")
-                    print(f"\n✅ Bot has {len(commands)} global commands registered on Discord's servers")
-                    if len(commands) > 0:
-                        print("Global commands found:")
-                        for cmd in commands:
-                            print(f" - /{cmd['name']}")
-                    else:
-                        print("No global commands found. Command sync may be failing or permissions/scopes are incorrect.")
-                else:
-                    logger.error(f"Commands API status: {response.status}")
-                    print(f"\n❌ Failed to check global commands: HTTP {response.status}")
+            await bot.load_extension(f"commands.{filename[:-3]}")
+            if filename == "tracked_collectionsout.py":
+                logger.info(f"Loaded {filename} (renamed tracked_collections)")
+            else:
+                logger.info(f"Loaded {filename}")
         except Exception as e:
-            logger.error(f"Failed to check Discord API status: {str(e)}")
-            print(f"\n❌ API connection error: {str(e)}")
+            logger.error(f"Failed to load {filename}: {str(e)}")
 
-async def manually_register_commands():
-    """Manually register commands via Discord API as a fallback if sync fails."""
-    async with aiohttp.ClientSession() as session:
-        headers = {'Authorization': f'Bot {config.BOT_TOKEN}', 'Content-Type': 'application/json'}
-        commands_data = [
-            {
-                "name": "ping",
-                "description": "Check if the bot is online",
-                "type": 1  # CHAT_INPUT
-            },
-            {
-                "name": "start_track",
-                "description": "Start tracking NFT sales for an Abstract collection",
-                "type": 1,  # CHAT_INPUT
-                "options": [
-                    {
-                        "name": "collection_address",
-                        "description": "The address of the Abstract NFT collection",
-                        "type": 3,  # STRING
-                        "required": True
-                    },
-                    {
-                        "name": "channel",
-                        "description": "The Discord channel for sale notifications",
-                        "type": 7,  # CHANNEL
-                        "required": True
-                    },
-                    {
-                        "name": "sales_threshold",
-                        "description": "Minimum sales required to trigger notifications (default: 1)",
-                        "type": 4,  # INTEGER
-                        "required": False
-                    }
-                ]
-            },
-            {
-                "name": "stop_track",
-                "description": "Stop tracking NFT sales for an Abstract collection",
-                "type": 1,  # CHAT_INPUT
-                "options": [
-                    {
-                        "name": "collection_address",
-                        "description": "The address of the Abstract NFT collection",
-                        "type": 3,  # STRING
-                        "required": True
-                    }
-                ]
-            },
-            {
-                "name": "tracked_collectionsout",
-                "description": "Show all currently tracked Abstract NFT collections",
-                "type": 1  # CHAT_INPUT
-            }
-        ]
-        url = f'https://discord.com/api/v10/applications/{config.APPLICATION_ID}/commands'
-
-        for cmd_data in commands_data:
-            try:
-                async with session.post(url, headers=headers, json=cmd_data) as response:
-                    if response.status in (200, 201):
-                        result = await response.json()
-                        logger.info(f"Manually registered command /{result['name']}")
-                        print(f"✅ Successfully registered /{result['name']} manually!")
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Manual command registration failed for /{cmd_data['name']}: {response.status} - {error_text}")
-                        print(f"❌ Manual registration failed for /{cmd_data['name']}: HTTP {response.status}")
-                        print(f"   Error: {error_text}")
-            except Exception as e:
-                logger.error(f"Failed manual command registration for /{cmd_data['name']}: {str(e)}")
-                print(f"❌ Error during manual registration for /{cmd_data['name']}: {str(e)}")
+# Load all commands from /commands folder; a cog that fails to load is logged
+# and skipped so the rest still register
+async def load_commands():
+    for filename in sorted(os.listdir("./commands")):
+        if filename.endswith(".py") and filename != "tracked_collections.py":
+            await load_extension(filename)
+    startup_profile.mark("commands loaded")
 
 @bot.event
 async def on_ready():
@@ -177,21 +73,21 @@ async def on_ready():
         logger.debug(f"Bot object: {bot}")
         logger.debug(f"Bot intents: {bot.intents}")
         logger.debug(f"Bot application_id: {bot.application_id}")
+        startup_profile.mark("gateway ready")
 
-        # Check Discord API status before syncing
-        await check_discord_api_status()
-
-        # Skip synchronization and go straight to manual registration
-        # This avoids NoneType issues with bot.tree
-        logger.info("Skipping automatic command sync and using manual registration directly")
-        print("\n🔄 Using direct API registration for commands instead of sync")
-        
-        # Directly register commands via the Discord API
-        await manually_register_commands()
-
-        # Log success of manual registration method
-        logger.info("Manual command registration completed")
-        print("\n✅ Manual command registration completed - commands should be available shortly")
+        # Register slash commands once per process, and only if the tree changed
+        # since the last successful registration; reconnects cost no API calls.
+        # A failed sync is retried on the next on_ready and never blocks monitoring
+        global commands_registered
+        if not commands_registered:
+            try:
+                synced = await sync_commands_if_changed(bot)
+                commands_registered = True
+                if synced is not None:
+                    print(f"\n✅ Registered {len(synced)} slash commands with Discord")
+            except Exception as e:
+                logger.error(f"Failed to sync commands: {str(e)}")
+                logger.warning("Slash commands may be outdated until the next reconnect.")
 
         logger.info(f"Logged in as {bot.user.name}#{bot.user.discriminator} | Connected to Discord!" if bot.user else "Bot is not logged in | Connected to Discord!")
 
@@ -205,10 +101,18 @@ async def on_ready():
 
         # Start sales monitoring
         logger.info("Starting sales monitoring for Abstract collections")
-        bot.loop.create_task(monitor_sales(bot))
+        # Named tasks: a reconnect's on_ready finds them running and starts no duplicates
+        lifecycle.start_task("monitor_sales", lambda: monitor_sales(bot), drain=True)
+        lifecycle.start_task("digests", lambda: run_digests(bot))
+
+        if startup_profile.ENABLED:
+            print(startup_profile.report())
     except Exception as e:
-        logger.error(f"Failed to sync commands: {str(e)}")
-        logger.warning("Bot will continue to run, but slash commands may not work.")
+        logger.error(f"Error in on_ready: {str(e)}")
+
+@bot.listen("on_interaction")
+async def mark_first_interaction(interaction: discord.Interaction):
+    startup_profile.mark("first interaction")
 
 # Only set up command error handler if bot.tree is available
 try:
@@ -238,6 +142,12 @@ except Exception as e:
     logger.warning(f"Could not set up command error handler: {str(e)}")
     print("⚠️ Command error handler not set up - falling back to default error handling")
 
+async def shutdown():
+    """Drain the sales monitor and checkpoint state while Discord is still connected, then disconnect."""
+    await lifecycle.shutdown()
+    if not bot.is_closed():
+        await bot.close()
+
 # Run the bot
 async def main():
     max_retries = 5
@@ -263,6 +173,20 @@ async def main():
         print("Please check your Discord Developer Portal and ensure you've copied the entire token correctly.")
         return
 
+    try:
+        metrics_runner = await start_metrics_server(config.METRICS_HOST,
+                                                    config.METRICS_PORT)
+    except OSError as e:
+        metrics_runner = None
+        logger.error(f"Could not start metrics endpoint: {str(e)}")
+
+    if config.LOOP_MONITOR_ENABLED:
+        loop_monitor.interval = config.LOOP_MONITOR_INTERVAL_MS / 1000
+        loop_monitor.threshold = config.LOOP_LAG_THRESHOLD_MS / 1000
+        loop_monitor.start()
+
+    install_signal_handlers(lambda: asyncio.ensure_future(shutdown()))
+
     for attempt in range(max_retries):
         try:
             async with bot:
@@ -291,10 +215,15 @@ async def main():
             logger.error(f"Fatal error: {str(e)}")
             print(f"\n❌ Fatal error: {str(e)}")
         finally:
+            await lifecycle.shutdown()
             if bot.is_ready():
                 await bot.close()
                 logger.info("Discord connection closed")
         break
 
+    loop_monitor.stop()
+    if metrics_runner:
+        await metrics_runner.cleanup()
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,64 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from utils import backfill, sales_store
+from utils.backfill import Backfill
+from utils.sale_event import SaleEvent
+
+COLLECTION = "0x" + "ab" * 20
+
+
+class RangeLimitedAPI:
+    """Rejects getLogs ranges wider than max_range; one 1 ABS sale every 10 blocks."""
+
+    def __init__(self, max_range):
+        self.max_range = max_range
+        self.scanned = []
+
+    def get_transfer_logs(self, address, from_block, to_block):
+        if to_block - from_block + 1 > self.max_range:
+            raise ValueError("query returned more than 10000 results")
+        self.scanned.append((from_block, to_block))
+        return [block for block in range(from_block, to_block + 1)
+                if block % 10 == 0]
+
+    def extract_sale(self, block):
+        return SaleEvent(bytes.fromhex(COLLECTION[2:]), bytes(20),
+                         bytes(20), block, block.to_bytes(32, "big"), block,
+                         0, 1, Decimal(1))
+
+
+@pytest.fixture(autouse=True)
+def data_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(backfill, "BACKFILL_DIR", str(tmp_path / "backfill"))
+    monkeypatch.setattr(sales_store, "SALES_DIR", str(tmp_path / "sales"))
+    monkeypatch.setattr(sales_store, "_known_keys", {})
+
+
+def test_rejected_ranges_are_split_until_they_fit():
+    api = RangeLimitedAPI(max_range=300)
+    job = Backfill(api, COLLECTION, 1000, 5999, concurrency=2,
+                   initial_chunk=2000)
+    result = asyncio.run(job.run())
+
+    blocks = sorted(b for start, end in api.scanned
+                    for b in range(start, end + 1))
+    assert blocks == list(range(1000, 6000))  # Every block exactly once
+    assert all(end - start + 1 <= 300 for start, end in api.scanned)
+    assert job.max_chunk < 2000
+    assert result["next_block"] == 6000
+    assert result["sales_found"] == 500
+    assert Decimal(result["volume"]) == 500
+    assert backfill.load_checkpoint(COLLECTION) is None
+
+
+def test_rescanned_sales_are_not_counted_twice():
+    asyncio.run(Backfill(RangeLimitedAPI(10**6), COLLECTION, 0, 999).run())
+    # As on resume, when chunks past next_block are scanned again
+    result = asyncio.run(
+        Backfill(RangeLimitedAPI(10**6), COLLECTION, 0, 999).run())
+    assert result["sales_found"] == 0
+    assert Decimal(result["volume"]) == 0
+    assert len(sales_store.load_sales(COLLECTION)) == 100
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.digests import DigestStore, HyperLogLog
+
+
+def wallets(start, count):
+    return [i.to_bytes(20, "big") for i in range(start, start + count)]
+
+
+@pytest.mark.parametrize("count", [1000, 10000, 100000])
+def test_hll_is_within_three_standard_errors(count):
+    sketch = HyperLogLog()
+    for wallet in wallets(0, count):
+        sketch.add(wallet)
+    assert abs(sketch.count() - count) <= 3 * 1.04 / 32 * count
+
+
+def test_hll_small_counts_are_close_to_exact():
+    sketch = HyperLogLog()
+    for wallet in wallets(0, 50) * 3:  # Repeat buyers count once
+        sketch.add(wallet)
+    assert abs(sketch.count() - 50) <= 2
+
+
+def test_hll_merge_and_round_trip():
+    a, b = HyperLogLog(), HyperLogLog()
+    for wallet in wallets(0, 3000):
+        a.add(wallet)
+    for wallet in wallets(2000, 3000):
+        b.add(wallet)
+    a.merge(b)
+    restored = HyperLogLog.from_text(a.to_text())
+    assert restored.count() == a.count()
+    assert abs(a.count() - 5000) <= 3 * 1.04 / 32 * 5000
+
+
+def test_late_sale_does_not_reopen_a_posted_period(tmp_path):
+    store = DigestStore(str(tmp_path / "digests.json"))
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).timestamp()
+    store.record_sale("0xa", 1, 1, bytes(20), "0x1", yesterday)
+    for frequency, key, _ in store.completed_periods():
+        if frequency == "daily":
+            store.discard(frequency, key)
+    store.save()
+
+    store = DigestStore(store.path)
+    store.record_sale("0xa", 2, 1, bytes(20), "0x2", yesterday)
+    assert all(frequency != "daily"
+               for frequency, _, _ in store.completed_periods())
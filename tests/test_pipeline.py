@@ -0,0 +1,174 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from web3 import Web3
+
+from benchmarks import pipeline
+from utils.replay import (FixtureRecorder, RecordingProvider, StubBot,
+                          SyntheticChain, offline_api, run_replay)
+
+
+# mintout is covered below at a size that keeps the suite fast
+@pytest.mark.parametrize("name", ["idle", "steady", "sweep", "erc1155"])
+def test_scenario_sales_and_posts(name):
+    result = asyncio.run(pipeline.run_scenario(name))
+    assert (result["sales"], result["posts"]) == pipeline.EXPECTED[name]
+
+
+def poll(chain, collections):
+    """Run one poll and return the (price, quantity) of every posted sale."""
+    chain.head = pipeline.HEAD
+    api = offline_api(chain, StubBot(), pipeline.tracked(collections, 1))
+    posted = []
+
+    async def post(collection, token_id, price, *args, quantity=1, **kwargs):
+        posted.append((price, quantity))
+
+    api.post_sale_to_discord = post
+    asyncio.run(api.fallback_poll_sales())
+    return posted
+
+
+def test_free_mints_are_not_sales():
+    chain = SyntheticChain(head=pipeline.HEAD)
+    address = pipeline.collection_address(0)
+    for token_id in range(50):
+        chain.add_transfer(address, token_id, pipeline.ZERO, pipeline.BUYER, 0,
+                           pipeline.HEAD - 1)
+    assert poll(chain, [address]) == []
+
+
+def test_sweep_splits_the_transaction_value():
+    chain = SyntheticChain(head=pipeline.HEAD)
+    address = pipeline.collection_address(0)
+    tx_hash = None
+    for token_id in range(4):
+        tx_hash = chain.add_transfer(address, token_id, pipeline.SELLER,
+                                     pipeline.BUYER, 2 * 10**18,
+                                     pipeline.HEAD - 1, tx_hash)
+    assert poll(chain, [address]) == [(Decimal("0.5"), 1)] * 4
+
+
+def test_batch_splits_the_transaction_value_by_quantity():
+    chain = SyntheticChain(head=pipeline.HEAD)
+    address = pipeline.collection_address(0)
+    chain.add_transfer_batch(address, [1, 2], [1, 3], pipeline.SELLER,
+                             pipeline.BUYER, 4 * 10**18, pipeline.HEAD - 1)
+    assert poll(chain, [address]) == [(Decimal("1"), 1), (Decimal("3"), 3)]
+
+
+def test_offline_api_never_uses_shared_services(monkeypatch):
+    import config
+    from utils import wallet_labels
+
+    monkeypatch.setattr(config, "NAME_SERVICE_RESOLVER", "0x" + "ee" * 20)
+    monkeypatch.setattr(wallet_labels, "_resolver", None)
+    api = offline_api(SyntheticChain(), StubBot(), pipeline.tracked([]))
+    assert api.label_resolver.reverse_resolver is None
+    assert api.digest_store.path is None
+
+
+def test_first_sale_waits_briefly_for_a_fast_name_lookup():
+    from utils.wallet_labels import WalletLabelResolver
+
+    class FastResolver(WalletLabelResolver):
+
+        async def _lookup_batch(self, addresses):
+            for address in addresses:
+                self.cache.put(address, f"name-{address.hex()[:4]}")
+                self._inflight.pop(address).set_result(None)
+
+    chain = SyntheticChain(head=pipeline.HEAD)
+    address = pipeline.collection_address(0)
+    chain.add_transfer(address, 1, pipeline.SELLER, pipeline.BUYER, 10**18,
+                       pipeline.HEAD - 1)
+    chain.head = pipeline.HEAD
+    api = offline_api(chain, StubBot(), pipeline.tracked([address], 1))
+    api.label_resolver = FastResolver(reverse_resolver="0x" + "ee" * 20)
+    labels = []
+
+    async def post(*args, buyer_label=None, seller_label=None, **kwargs):
+        labels.append((buyer_label, seller_label))
+
+    api.post_sale_to_discord = post
+    asyncio.run(api.fallback_poll_sales())
+    assert labels == [("name-2222", "name-1111")]
+
+
+def test_websocket_loop_follows_subscription_changes(monkeypatch):
+    from types import SimpleNamespace
+
+    from utils import api_handler
+
+    class FakeFilter:
+
+        def __init__(self, criteria):
+            self.addresses = criteria["address"]
+            self.filter_id = len(filters)
+            self.entries = []
+
+        def get_new_entries(self):
+            entries, self.entries = self.entries, []
+            return entries
+
+    filters, uninstalled, posted, steps = [], [], [], []
+    first, second = pipeline.collection_address(0), pipeline.collection_address(1)
+    chain = SyntheticChain(head=pipeline.HEAD)
+    chain.add_transfer(second, 1, pipeline.SELLER, pipeline.BUYER, 10**18,
+                       pipeline.HEAD - 1)
+    tracked = pipeline.tracked([first], 1)
+    api = offline_api(chain, StubBot(), tracked)
+    api.w3_ws = SimpleNamespace(eth=SimpleNamespace(
+        filter=lambda criteria: filters.append(FakeFilter(criteria)) or
+        filters[-1],
+        uninstall_filter=uninstalled.append,
+        block_number=pipeline.HEAD))
+    monkeypatch.setattr(api_handler, "SUBSCRIPTION_RELOAD_SECONDS", 0)
+
+    async def post(collection, token_id, price, buyer, seller, tx_hash,
+                   channel_ids, **kwargs):
+        posted.append((collection, channel_ids))
+
+    async def step(seconds):
+        steps.append(seconds)
+        if len(steps) == 1:
+            # /start_track for a second collection while connected
+            tracked["abstract"].update(pipeline.tracked([second], 3)["abstract"])
+        elif len(steps) == 2:
+            filters[-1].entries = api.w3_http.eth.get_logs({
+                "fromBlock": 0,
+                "address": Web3.to_checksum_address(second)
+            })
+        else:
+            api.stop()
+
+    api.post_sale_to_discord = post
+    api.wait_or_stop = step
+    asyncio.run(api.listen_for_sales())
+    assert [len(f.addresses) for f in filters] == [1, 2]
+    assert uninstalled == [0]
+    assert posted == [(Web3.to_checksum_address(second), [1000, 1001, 1002])]
+    assert api.cursor == pipeline.HEAD  # Advanced by the head, not only by sales
+
+
+def test_replay_resumes_from_the_recorded_cursor(tmp_path):
+    chain = SyntheticChain(head=pipeline.HEAD)
+    address = pipeline.collection_address(0)
+    for block in range(pipeline.HEAD - 500, pipeline.HEAD, 100):
+        chain.add_transfer(address, block, pipeline.SELLER, pipeline.BUYER,
+                           10**18, block)
+    fixture = FixtureRecorder(str(tmp_path / "run.json"))
+    stub_bot = StubBot()
+    api = offline_api(RecordingProvider(chain, fixture), stub_bot,
+                      pipeline.tracked([address], 1))
+    fixture.tracked_collections = api.tracked_collections
+    api.restore_state({"cursor": pipeline.HEAD - 301})  # As from a checkpoint
+    fixture.start_state = api.export_state()
+    asyncio.run(api.fallback_poll_sales())
+    fixture.save()
+
+    result = asyncio.run(run_replay(fixture.path))
+    assert len(stub_bot.sent) == 3
+    assert len(result["sent"]) == 3
+    assert result["rpc_misses"] == 0
@@ -0,0 +1,54 @@
+from utils.replay import SyntheticChain
+from utils.sale_event import decode_log, decode_logs
+
+COLLECTION = "0x" + "ab" * 20
+SELLER = "0x" + "11" * 20
+BUYER = "0x" + "22" * 20
+
+
+def test_decode_erc721_transfer():
+    chain = SyntheticChain()
+    tx_hash = chain.add_transfer(COLLECTION, 42, SELLER, BUYER, 10**18, 100)
+    [event] = decode_log(chain.logs[0])
+    assert event.collection_hex == COLLECTION
+    assert (event.seller_hex, event.buyer_hex) == (SELLER, BUYER)
+    assert (event.token_id, event.quantity) == (42, 1)
+    assert event.tx_hash_hex == tx_hash
+    assert (event.block_number, event.log_index) == (100, 0)
+
+
+def test_decode_transfer_single():
+    chain = SyntheticChain()
+    chain.add_transfer_batch(COLLECTION, [7], [5], SELLER, BUYER, 0, 100)
+    [event] = decode_log(chain.logs[0])
+    assert (event.token_id, event.quantity) == (7, 5)
+    assert (event.seller_hex, event.buyer_hex) == (SELLER, BUYER)
+
+
+def test_decode_transfer_batch_yields_one_event_per_token():
+    chain = SyntheticChain()
+    chain.add_transfer_batch(COLLECTION, [1, 2, 3], [4, 5, 6], SELLER, BUYER,
+                             0, 100)
+    events = decode_log(chain.logs[0])
+    assert [(e.token_id, e.quantity) for e in events] == [(1, 4), (2, 5),
+                                                          (3, 6)]
+    assert len({e.sale_id for e in events}) == 3
+
+
+def test_decode_unknown_topic():
+    log = dict(address=COLLECTION,
+               topics=["0x" + "00" * 32],
+               data="0x",
+               transactionHash="0x" + "00" * 32)
+    assert decode_log(log) == []
+    assert decode_log(dict(log, topics=[])) == []
+
+
+def test_decode_logs_counts_tokens_per_transaction():
+    chain = SyntheticChain()
+    sweep = chain.add_transfer(COLLECTION, 1, SELLER, BUYER, 10**18, 100)
+    chain.add_transfer(COLLECTION, 2, SELLER, BUYER, 10**18, 100, sweep)
+    chain.add_transfer_batch(COLLECTION, [3, 4], [2, 3], SELLER, BUYER, 0, 101)
+    chain.add_transfer(COLLECTION, 5, SELLER, BUYER, 10**18, 102)
+    events = decode_logs(chain.logs)
+    assert [e.tx_units for e in events] == [2, 2, 5, 5, 1]
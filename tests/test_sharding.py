@@ -0,0 +1,37 @@
+from utils.sharding import HashRing
+
+KEYS = [f"0x{i:040x}" for i in range(2000)]
+
+
+def owners(ring):
+    return {key: ring.get_node(key) for key in KEYS}
+
+
+def test_empty_ring():
+    assert HashRing().get_node(KEYS[0]) is None
+
+
+def test_keys_are_case_insensitive():
+    ring = HashRing(range(4))
+    assert ring.get_node("0xABCDEF") == ring.get_node("0xabcdef")
+
+
+def test_removing_a_node_only_remaps_its_keys():
+    ring = HashRing(range(4))
+    before = owners(ring)
+    ring.remove_node(2)
+    after = owners(ring)
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert moved and all(before[key] == 2 for key in moved)
+    assert 2 not in ring.nodes
+
+
+def test_adding_a_node_only_takes_keys_for_itself():
+    ring = HashRing(range(4))
+    before = owners(ring)
+    ring.add_node(4)
+    after = owners(ring)
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(after[key] == 4 for key in moved)
+    # About a fifth of the keys move to the new node
+    assert len(KEYS) * 0.1 < len(moved) < len(KEYS) * 0.3
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from utils.subscriptions import (add_subscription, get_channel_ids,
+                                 migrate_entry, remove_subscription)
+
+COLLECTION = "0x" + "ab" * 20
+
+
+def legacy_collections():
+    return {
+        "abstract": {
+            COLLECTION: {
+                "channel_id": 10,
+                "sales_threshold": 3
+            }
+        }
+    }
+
+
+def get_channel(channel_id):
+    """bot.get_channel stand-in: channel 10 is in guild 1, others are unknown."""
+    if channel_id == 10:
+        return SimpleNamespace(guild=SimpleNamespace(id=1))
+    return None
+
+
+def test_legacy_entry_is_migrated():
+    entry = migrate_entry(COLLECTION,
+                          legacy_collections()["abstract"][COLLECTION])
+    assert entry == {
+        "CA_or_ME": COLLECTION,
+        "subscriptions": [{
+            "guild_id": None,
+            "channel_id": 10,
+            "sales_threshold": 3
+        }]
+    }
+
+
+def test_legacy_guild_is_resolved_from_the_channel():
+    entry = migrate_entry(COLLECTION,
+                          legacy_collections()["abstract"][COLLECTION],
+                          get_channel)
+    assert entry["subscriptions"][0]["guild_id"] == 1
+
+
+def test_fan_out_to_several_channels():
+    tracked = legacy_collections()
+    assert add_subscription(tracked, COLLECTION, 2, 20)
+    assert not add_subscription(tracked, COLLECTION, 2, 20)
+    assert get_channel_ids(tracked["abstract"][COLLECTION]) == [10, 20]
+
+
+def test_missing_guild_never_matches_everything():
+    tracked = legacy_collections()
+    add_subscription(tracked, COLLECTION, 2, 20)
+    assert remove_subscription(tracked, COLLECTION, guild_id=None) == 0
+    # The unresolved legacy subscription does not belong to guild 2
+    assert remove_subscription(tracked, COLLECTION, guild_id=2) == 1
+    assert get_channel_ids(tracked["abstract"][COLLECTION]) == [10]
+
+
+def test_removing_a_guilds_last_subscription_drops_the_collection():
+    tracked = legacy_collections()
+    migrate_entry(COLLECTION, tracked["abstract"][COLLECTION], get_channel)
+    assert remove_subscription(tracked, COLLECTION, guild_id=1) == 1
+    assert COLLECTION not in tracked["abstract"]
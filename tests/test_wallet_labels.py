@@ -0,0 +1,33 @@
+import config
+from utils import wallet_labels
+from utils.wallet_labels import LabelCache, WalletLabelResolver
+
+WALLET = bytes.fromhex("22" * 20)
+
+
+def test_label_cache_size_is_honoured(monkeypatch):
+    monkeypatch.setattr(config, "LABEL_CACHE_SIZE", 5)
+    monkeypatch.setattr(wallet_labels, "_resolver", None)
+    assert wallet_labels.get_resolver().cache.capacity == 5
+
+
+def test_empty_cache_is_kept():
+    cache = LabelCache(capacity=5)
+    assert WalletLabelResolver(cache=cache).cache is cache
+
+
+def test_cache_evicts_least_recently_used():
+    cache = LabelCache(capacity=2)
+    cache.put(b"a", "A")
+    cache.put(b"b", None)  # A cached miss
+    cache.get(b"a")
+    cache.put(b"c", "C")
+    assert cache.get(b"a") == (True, "A")
+    assert cache.get(b"b") == (False, None)
+
+
+def test_without_name_service_nothing_is_looked_up():
+    resolver = WalletLabelResolver({WALLET: "Treasury"})
+    assert resolver.label(WALLET) == "Treasury"
+    assert resolver.label(bytes(20)) == "Mint"
+    assert resolver.cached(bytes.fromhex("33" * 20)) == (True, None)
@@ -1,54 +1,127 @@
 from web3 import Web3
-import json
 import asyncio
 import os
+import time
 from web3.providers.websocket import WebsocketProvider  # Correct for web3==6.13.0
 import logging
+import config
+from utils.subscriptions import load_tracked_collections, get_channel_ids
+from utils.topics import NFT_TRANSFER_TOPICS
+from utils import metrics
+from utils.tracing import SaleTrace
+from utils.sale_event import decode_logs
+from utils.digests import get_store as get_digest_store
+from utils.wallet_labels import get_resolver as get_label_resolver
 
-# Set up logging to match main.py
-logging.basicConfig(filename='./data/logs/bot.log',
-                    level=logging.INFO,
-                    format='%(asctime)s %(levelname)s: %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 
 ABSTRACT_WS_RPC = os.getenv('ABSTRACT_WS_RPC', 'wss://api.mainnet.abs.xyz/ws')
 ABSTRACT_HTTP_RPC = os.getenv('ABSTRACT_HTTP_RPC',
                               'https://abstract.rpc.thirdweb.com')
 
-# ERC721 ABI for Transfer events (simplified; update if Abstract uses custom ABI)
-ERC721_ABI = json.loads(
-    '[{"anonymous":false,"inputs":[{"indexed":true,"name":"from","type":"address"},{"indexed":true,"name":"to","type":"address"},{"indexed":true,"name":"tokenId","type":"uint256"}],"name":"Transfer","type":"event"}]'
-)
+# Token standards are decoded by topic0 in utils/sale_event.py (TOPIC_DECODERS)
+
+MAX_PROCESSED_SALES = 1000  # Dedup window; oldest sales are forgotten first
+SUBSCRIPTION_RELOAD_SECONDS = 10  # How often the WebSocket loop re-reads subscriptions
 
 
 class AbstractAPI:
     """Handles connections to the Abstract blockchain for NFT sales tracking."""
 
-    def __init__(self):
+    def __init__(self,
+                 sale_sink=None,
+                 http_provider=None,
+                 ws_provider=None,
+                 tracked_collections=None,
+                 digest_store=None,
+                 label_resolver=None):
+        """
+        Args:
+            sale_sink: Optional coroutine receiving sale dicts instead of posting directly (sharded mode).
+            http_provider: web3 provider to use instead of ABSTRACT_HTTP_RPC (recording, replay, stubs).
+                When given without ws_provider, the WebSocket is not used.
+            ws_provider: web3 provider to use instead of ABSTRACT_WS_RPC.
+            tracked_collections: Fixed collections to watch instead of the JSON file.
+            digest_store: DigestStore to aggregate into instead of the shared one (soak tests).
+            label_resolver: WalletLabelResolver to use instead of the shared one (soak tests).
+        """
+        self.sale_sink = sale_sink
+        self.ws_provider = ws_provider
+        self.ws_enabled = ws_provider is not None or http_provider is None
+        self.static_collections = tracked_collections
+        self.digest_store = digest_store
+        self.label_resolver = label_resolver
         self.w3_ws = None
-        self.w3_http = Web3(Web3.HTTPProvider(ABSTRACT_HTTP_RPC))
+        self.w3_http = Web3(http_provider
+                            or Web3.HTTPProvider(ABSTRACT_HTTP_RPC))
+        self.w3_http.middleware_onion.add(
+            metrics.rpc_metrics_middleware("http"), "rpc_metrics")
         self.tracked_collections = self.load_tracked_collections()
-        self.processed_sales = set()
-        self.connect_to_ws()
+        self.processed_sales = {}  # SaleEvent.sale_id -> None, oldest first
+        self.cursor = None  # Last block whose logs were fully processed
+        self.stop_event = asyncio.Event()
+        self.block_timestamps = {}  # block number -> future of its unix time, for tracing
+        self.last_tx_value = (None, 0)  # (tx hash, value); events of one tx arrive together
+        # The WebSocket is opened by listen_for_sales, off the event loop
 
-    def load_tracked_collections(self):
-        """Load tracked collections from JSON file."""
-        DATA_FILE = "./data/tracked_collections.json"
-        os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
+    @property
+    def stopping(self):
+        return self.stop_event.is_set()
+
+    def stop(self):
+        """Ask the listen/poll loops to return after the sale in hand."""
+        self.stop_event.set()
+
+    async def wait_or_stop(self, seconds):
+        """Sleep for `seconds`, waking early if stop() is called."""
         try:
-            if os.path.exists(DATA_FILE):
-                with open(DATA_FILE, "r") as f:
-                    return json.load(f)
-            return {"abstract": {}, "ABS": {}}
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in {DATA_FILE}: {e}")
-            return {"abstract": {}, "ABS": {}}
+            await asyncio.wait_for(self.stop_event.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def export_state(self):
+        """Cursor and dedup window as JSON-serializable data, for checkpoints."""
+        return {
+            "cursor": self.cursor,
+            "processed_sales": [
+                f"0x{collection.hex()}:0x{tx_hash.hex()}:{log_index}:{token_id}"
+                for collection, tx_hash, log_index, token_id in
+                self.processed_sales
+            ]
+        }
+
+    def restore_state(self, state):
+        """Resume from export_state() output: polling continues after the cursor."""
+        self.cursor = state.get("cursor")
+        for sale_id in state.get("processed_sales", []):
+            parts = sale_id.split(":")
+            if len(parts) != 4:
+                continue  # Per-transaction keys from older checkpoints
+            collection, tx_hash, log_index, token_id = parts
+            self.remember_sale(
+                (bytes.fromhex(collection[2:]), bytes.fromhex(tx_hash[2:]),
+                 None if log_index == "None" else int(log_index),
+                 None if token_id == "None" else int(token_id)))
+
+    def remember_sale(self, sale_id):
+        self.processed_sales[sale_id] = None
+        if len(self.processed_sales) > MAX_PROCESSED_SALES:
+            # Forget the oldest only; clearing everything would re-post recent sales
+            del self.processed_sales[next(iter(self.processed_sales))]
+
+    def load_tracked_collections(self):
+        """Load tracked collections (and their channel subscriptions) from JSON file."""
+        if self.static_collections is not None:
+            return self.static_collections
+        return load_tracked_collections()
 
     def connect_to_ws(self):
         """Establish WebSocket connection to Abstract."""
         try:
-            self.w3_ws = Web3(WebsocketProvider(ABSTRACT_WS_RPC))
+            self.w3_ws = Web3(self.ws_provider
+                              or WebsocketProvider(ABSTRACT_WS_RPC))
+            self.w3_ws.middleware_onion.add(
+                metrics.rpc_metrics_middleware("ws"), "rpc_metrics")
             if self.w3_ws.is_connected():
                 logger.info("Connected to Abstract WebSocket")
             else:
@@ -62,59 +135,121 @@ class AbstractAPI:
     async def listen_for_sales(self):
         """Listen for NFT sales in real-time via WebSocket."""
         try:
+            if not self.w3_ws and self.ws_enabled:
+                await asyncio.to_thread(self.connect_to_ws)
             if not self.w3_ws:
                 logger.warning("No WebSocket connection; using HTTP polling")
                 await self.fallback_poll_sales()
                 return
 
-            # Subscribe to Transfer events for all tracked collections
-            for blockchain in ["abstract"]:  # Focus only on Abstract
-                for collection, data in self.tracked_collections.get(
-                        blockchain, {}).items():
-                    contract_address = Web3.to_checksum_address(collection)
-                    contract = self.w3_ws.eth.contract(
-                        address=contract_address, abi=ERC721_ABI)
-                    event_filter = contract.events.Transfer.create_filter(
-                        fromBlock="latest")
-
-                    while True:
-                        for event in event_filter.get_new_entries():
-                            await self.handle_sale_event(
-                                event, contract_address, data)
-                        await asyncio.sleep(
-                            1)  # Small delay to prevent overwhelming
+            collections = {}  # raw address bytes -> (checksum address, data)
+            event_filter = None
+            reload_at = 0
+            while not self.stopping:
+                if time.monotonic() >= reload_at:
+                    # Pick up /start_track and /stop_track changes while connected
+                    reload_at = time.monotonic() + SUBSCRIPTION_RELOAD_SECONDS
+                    self.tracked_collections = self.load_tracked_collections()
+                    previous = collections
+                    collections = self.ws_collections()
+                    if collections.keys() != previous.keys():
+                        old_filter = event_filter
+                        event_filter = self.transfer_filter(collections)
+                        if old_filter is not None:
+                            # Drain what the old filter saw before the new one existed
+                            await self.handle_ws_logs(
+                                await asyncio.to_thread(
+                                    old_filter.get_new_entries), collections)
+                            self.uninstall_filter(old_filter)
+                # Read the head first: every log up to it is in the entries below
+                head = await asyncio.to_thread(
+                    lambda: self.w3_ws.eth.block_number)
+                if event_filter is not None:
+                    await self.handle_ws_logs(
+                        await asyncio.to_thread(event_filter.get_new_entries),
+                        collections)
+                # Quiet blocks are done too; keeps checkpoints and block lag current
+                self.cursor = max(self.cursor or 0, head)
+                metrics.record_block_progress(head=head, cursor=self.cursor)
+                await self.wait_or_stop(1)  # Small delay to prevent overwhelming
         except Exception as e:
             logger.error(f"WebSocket error: {str(e)}")
             await self.fallback_poll_sales()  # Fall back to HTTP polling
 
+    def ws_collections(self):
+        """Return {raw address bytes: (checksum address, entry)} of the tracked collections."""
+        collections = {}
+        for blockchain in ["abstract"]:  # Focus only on Abstract
+            for collection, data in self.tracked_collections.get(
+                    blockchain, {}).items():
+                contract_address = Web3.to_checksum_address(collection)
+                collections[bytes.fromhex(contract_address[2:])] = (
+                    contract_address, data)
+        return collections
+
+    def transfer_filter(self, collections):
+        """One WebSocket log filter for every tracked collection and token standard."""
+        if not collections:
+            return None
+        return self.w3_ws.eth.filter({
+            "fromBlock": "latest",
+            "address": [address for address, _ in collections.values()],
+            "topics": [NFT_TRANSFER_TOPICS]
+        })
+
+    def uninstall_filter(self, event_filter):
+        try:
+            self.w3_ws.eth.uninstall_filter(event_filter.filter_id)
+        except Exception as e:
+            logger.debug(f"Could not uninstall log filter: {str(e)}")
+
+    async def handle_ws_logs(self, logs, collections):
+        """Post the sales among WebSocket logs, using each collection's current subscriptions."""
+        received_at = time.time()
+        metrics.LOGS_INGESTED.inc(len(logs))
+        for event in decode_logs(logs):
+            if event.collection not in collections:
+                continue  # Untracked since the filter was created
+            contract_address, data = collections[event.collection]
+            await self.handle_sale_event(event, contract_address, data,
+                                         received_at)
+            # Logs arrive in block order, so earlier blocks are done
+            self.cursor = max(self.cursor or 0, event.block_number - 1)
+            metrics.record_block_progress(cursor=self.cursor)
+
     async def fallback_poll_sales(self):
         """Poll for sales via HTTP if WebSocket fails, with exponential backoff."""
         max_retries = 5
         delay = 2
+        # Pick up subscriptions added or removed since the last poll
+        self.tracked_collections = self.load_tracked_collections()
         for attempt in range(max_retries):
             try:
-                latest_block = self.w3_http.eth.block_number
-                from_block = max(0, latest_block - 10)
+                # Blocking RPC and decoding run off the loop, as in Backfill._scan_range
+                latest_block = await asyncio.to_thread(
+                    lambda: self.w3_http.eth.block_number)
+                metrics.record_block_progress(head=latest_block)
+                from_block = self.poll_start_block(latest_block)
+                if from_block > latest_block:
+                    break  # No new blocks since the last poll
                 for blockchain in ["abstract"]:  # Focus only on Abstract
                     for collection, data in self.tracked_collections.get(
                             blockchain, {}).items():
                         contract_address = Web3.to_checksum_address(collection)
-                        events = self.w3_http.eth.get_logs({
-                            'fromBlock':
-                            from_block,
-                            'toBlock':
-                            latest_block,
-                            'address':
-                            contract_address,
-                            'topics': [
-                                self.w3_http.keccak(
-                                    text="Transfer(address,address,uint256)").
-                                hex()
-                            ]
-                        })
+                        events = await asyncio.to_thread(
+                            self.get_transfer_logs, contract_address,
+                            from_block, latest_block)
+                        received_at = time.time()
+                        metrics.LOGS_INGESTED.inc(len(events))
                         for event in events:
+                            if self.stopping:
+                                # Resume rescans this range; dedup skips what was posted
+                                self.cursor = from_block - 1
+                                return
                             await self.handle_sale_event(
-                                event, contract_address, data)
+                                event, contract_address, data, received_at)
+                self.cursor = latest_block
+                metrics.record_block_progress(cursor=latest_block)
                 break
             except Exception as e:
                 logger.error(
@@ -122,50 +257,206 @@ class AbstractAPI:
                 await asyncio.sleep(delay)
                 delay *= 2  # Exponential backoff
 
-    async def handle_sale_event(self, event, collection_address, data):
-        """Process a sale event and post to Discord if it's a valid sale."""
-        sale_id = f"{collection_address}_{event['transactionHash'].hex()}"
+    def poll_start_block(self, latest_block):
+        """First block to poll: right after the cursor, or the last 10 blocks without one.
+
+        A resume after long downtime is capped at RESUME_MAX_BLOCKS; older
+        sales can be loaded with !backfill.
+        """
+        if self.cursor is None:
+            return max(0, latest_block - 10)
+        oldest = max(0, latest_block - config.RESUME_MAX_BLOCKS)
+        if self.cursor + 1 < oldest:
+            logger.warning(
+                f"Cursor {self.cursor} is {latest_block - self.cursor} blocks behind; resuming from {oldest}")
+            return oldest
+        return self.cursor + 1
+
+    def get_transfer_logs(self, address, from_block, to_block):
+        """Fetch ERC-721 and ERC-1155 transfer logs in one call, decoded into SaleEvents.
+
+        Goes through the request manager rather than eth.get_logs so web3's
+        result formatters never build HexBytes topics for logs that are
+        decoded once and dropped. A TransferBatch log yields one event per token.
+        """
+        logs = self.w3_http.manager.request_blocking("eth_getLogs", [{
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block),
+            "address": [address],
+            "topics": [NFT_TRANSFER_TOPICS]
+        }])
+        return decode_logs(logs)
+
+    async def handle_sale_event(self,
+                                event,
+                                collection_address,
+                                data,
+                                received_at=None):
+        """Process a sale event and post to Discord if it's a valid sale.
+
+        Args:
+            event: SaleEvent decoded from the Transfer log.
+            received_at: Unix time the log arrived from the RPC, for latency tracing.
+        """
+        sale_id = event.sale_id
         if sale_id in self.processed_sales:
+            metrics.DEDUP_HITS.inc()
             return
 
         try:
-            # Extract sale details (simplified; adjust based on Abstract’s event structure)
-            token_id = int(event["topics"][3].hex(), 16) if len(
-                event["topics"]) > 3 else None
-            from_addr = "0x" + event["topics"][1].hex()[-40:]
-            to_addr = "0x" + event["topics"][2].hex()[-40:]
-            tx_hash = event["transactionHash"].hex()
-
-            # Check if this is a sale (e.g., value > 0 or marketplace event)
-            tx = self.w3_http.eth.get_transaction(tx_hash)
-            price = Web3.from_wei(tx['value'], 'ether') if tx and tx.get(
-                'value', 0) > 0 else None
-
-            logger.info(
-                f"Detected potential sale for collection {collection_address}, token {token_id}, price {price}"
-            )
-            if price or self.is_marketplace_sale(
-                    event):  # Add logic for marketplace sales
-                await self.post_sale_to_discord(collection_address, token_id,
-                                                price, from_addr, to_addr,
-                                                tx_hash, data['channel_id'])
-                self.processed_sales.add(sale_id)
-                logger.info(
-                    f"Processed sale for collection {collection_address}, token {token_id}"
-                )
-                if len(self.processed_sales) > 1000:
-                    self.processed_sales.clear()  # Manage memory
+            trace = SaleTrace(collection_address, received_at=received_at
+                              or time.time())
+            # Overlaps the block lookup with pricing instead of adding a round trip
+            block_time = self.block_timestamp(event.block_number)
+            # get_transaction blocks, so pricing always runs off the loop
+            sale = await asyncio.to_thread(self.extract_sale, event)
+            if sale:
+                trace.token_id = sale.token_id
+                trace.mark("classified")
+                # Wallet names are looked up for sales only, while the block time
+                # is awaited; the post waits at most LABEL_WAIT_MS in total, and
+                # a slower lookup is cached for the wallet's next sale
+                labels = self.label_resolver or get_label_resolver()
+                lookup = labels.start(sale.buyer, sale.seller)
+                lookup_deadline = time.monotonic() + config.LABEL_WAIT_MS / 1000
+                block_time = await block_time if block_time else None
+                if lookup is not None and not lookup.done():
+                    await asyncio.wait(
+                        [lookup],
+                        timeout=max(0.0, lookup_deadline - time.monotonic()))
+                if block_time:
+                    trace.mark("block", block_time)
+                metrics.SALES_DETECTED.inc()
+                tx_hash = sale.tx_hash_hex
+                # Daily/weekly digests are built from running aggregates
+                (self.digest_store or get_digest_store()).record_sale(
+                    sale.collection_hex, sale.token_id, sale.price, sale.buyer,
+                    tx_hash, block_time)
+                # Fetched once per sale, fanned out to every subscribed channel
+                await self.post_sale_to_discord(collection_address,
+                                                sale.token_id,
+                                                sale.price,
+                                                sale.buyer_hex,
+                                                sale.seller_hex,
+                                                tx_hash,
+                                                get_channel_ids(data),
+                                                trace=trace,
+                                                quantity=sale.quantity,
+                                                buyer_label=labels.label(
+                                                    sale.buyer),
+                                                seller_label=labels.label(
+                                                    sale.seller))
+                self.remember_sale(sale_id)
+                logger.info("sale processed",
+                            extra={
+                                "collection": collection_address,
+                                "token_id": sale.token_id,
+                                "price": str(sale.price),
+                                "tx": tx_hash
+                            })
         except Exception as e:
             logger.error(f"Error processing sale: {str(e)}")
 
+    def extract_sale(self, event):
+        """Fetch a transfer's transaction to decide whether it is a sale.
+
+        Args:
+            event: SaleEvent decoded from the transfer log.
+
+        Returns:
+            SaleEvent: The event with its price set to its share of the tx value
+                (buyer is the token recipient, seller the sender), or None if not a sale.
+        """
+        # Check if this is a sale (e.g., value > 0 or marketplace event).
+        # Batch transfers, sweeps and mints put many events in one tx: fetch it once.
+        tx_hash, value = self.last_tx_value
+        if tx_hash != event.tx_hash:
+            tx = self.w3_http.eth.get_transaction(event.tx_hash)
+            value = tx.get('value', 0) if tx else 0
+            self.last_tx_value = (event.tx_hash, value)
+        # One payment covers every token the tx moved: each gets its share
+        share = value * event.quantity // max(event.tx_units, event.quantity, 1)
+        price = Web3.from_wei(share, 'ether') if share > 0 else None
+
+        # One record per Transfer log, so keep it at debug level
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("transfer checked",
+                         extra={
+                             "collection": event.collection_hex,
+                             "token_id": event.token_id,
+                             "price": str(price)
+                         })
+        if not (price or self.is_marketplace_sale(event)):  # Add logic for marketplace sales
+            return None
+        event.price = price
+        return event
+
+    def block_timestamp(self, block_number):
+        """Return a future of a block's unix timestamp, fetched off the loop once per block.
+
+        Sales cluster in few blocks, so the last 256 are kept.
+        """
+        if block_number is None:
+            return None
+        future = self.block_timestamps.get(block_number)
+        if future is None:
+            if len(self.block_timestamps) >= 256:
+                self.block_timestamps.pop(next(iter(self.block_timestamps)))
+            future = asyncio.ensure_future(
+                asyncio.to_thread(self.fetch_block_timestamp, block_number))
+            self.block_timestamps[block_number] = future
+        return future
+
+    def fetch_block_timestamp(self, block_number):
+        """Blocking eth_getBlockByNumber; None if the block cannot be fetched."""
+        try:
+            return self.w3_http.eth.get_block(block_number)["timestamp"]
+        except Exception as e:
+            logger.debug(f"Could not fetch block {block_number}: {str(e)}")
+            return None
+
     def is_marketplace_sale(self, event):
         # Add logic to detect if this is a marketplace sale (e.g., specific event signature or contract)
         # Check Abstract docs for marketplace contracts or events
         return False  # Placeholder; implement based on Abstract’s structure
 
-    async def post_sale_to_discord(self, collection, token_id, price, buyer,
-                                   seller, tx_hash, channel_id):
+    async def post_sale_to_discord(self,
+                                   collection,
+                                   token_id,
+                                   price,
+                                   buyer,
+                                   seller,
+                                   tx_hash,
+                                   channel_ids,
+                                   trace=None,
+                                   quantity=1,
+                                   buyer_label=None,
+                                   seller_label=None):
+        if self.sale_sink:
+            await self.sale_sink({
+                "collection": collection,
+                "token_id": token_id,
+                "price": str(price) if price is not None else None,
+                "buyer": buyer,
+                "seller": seller,
+                "tx_hash": tx_hash,
+                "channel_ids": channel_ids,
+                "quantity": quantity,
+                "buyer_label": buyer_label,
+                "seller_label": seller_label,
+                "trace": trace.to_dict() if trace else None
+            })
+            return
         # Post to Discord (implemented in sales_posting.py)
         from utils.sales_posting import post_sale_to_discord
-        await post_sale_to_discord(collection, token_id, price, buyer, seller,
-                                   tx_hash, channel_id)
+        await post_sale_to_discord(collection,
+                                   token_id,
+                                   price,
+                                   buyer,
+                                   seller,
+                                   tx_hash,
+                                   channel_ids,
+                                   trace=trace,
+                                   quantity=quantity,
+                                   buyer_label=buyer_label,
+                                   seller_label=seller_label)
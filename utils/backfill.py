@@ -0,0 +1,208 @@
+import asyncio
+import json
+import os
+import time
+import logging
+from collections import deque
+from decimal import Decimal
+
+from utils.sales_store import append_sales
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_DIR = "./data/backfill"
+
+# Substrings RPC providers use when a getLogs range returns too much data
+TOO_MANY_RESULTS_ERRORS = ("more than", "too many", "limit exceeded",
+                           "response size", "range is too large",
+                           "block range")
+
+
+def is_too_many_results(error):
+    message = str(error).lower()
+    return any(text in message for text in TOO_MANY_RESULTS_ERRORS)
+
+
+def checkpoint_path(collection):
+    return os.path.join(BACKFILL_DIR, f"{collection.lower()}.json")
+
+
+def load_checkpoint(collection):
+    """Return the unfinished backfill checkpoint of a collection, if any."""
+    path = checkpoint_path(collection)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid backfill checkpoint {path}: {e}")
+        return None
+
+
+def save_checkpoint(checkpoint):
+    """Write a checkpoint atomically so a crash never leaves a half-written file."""
+    os.makedirs(BACKFILL_DIR, exist_ok=True)
+    path = checkpoint_path(checkpoint["collection"])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoint(collection):
+    path = checkpoint_path(collection)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class Backfill:
+    """Scans a historical block range for sales in adaptive, concurrent chunks.
+
+    Chunks are halved when the RPC rejects a range for returning too many logs
+    and doubled when a chunk comes back small. Progress is checkpointed as the
+    highest block below which every chunk has been stored, so a resumed run
+    never skips a range and rescans at most the chunks that were in flight.
+    """
+
+    def __init__(self,
+                 api,
+                 collection,
+                 from_block,
+                 to_block,
+                 concurrency=4,
+                 initial_chunk=2000,
+                 min_chunk=1,
+                 max_chunk=50000,
+                 small_result=500,
+                 max_attempts=3):
+        self.api = api
+        self.collection = collection.lower()
+        self.concurrency = concurrency
+        self.chunk_size = initial_chunk
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.small_result = small_result
+        self.max_attempts = max_attempts
+        self.checkpoint = {
+            "collection": self.collection,
+            "from_block": from_block,
+            "to_block": to_block,
+            "next_block": from_block,
+            "sales_found": 0,
+            "volume": "0"
+        }
+
+    @classmethod
+    def resume(cls, api, checkpoint, **kwargs):
+        """Continue a backfill from a saved checkpoint."""
+        backfill = cls(api, checkpoint["collection"], checkpoint["from_block"],
+                       checkpoint["to_block"], **kwargs)
+        backfill.checkpoint.update(checkpoint)
+        return backfill
+
+    async def _scan_range(self, start, end):
+        """Fetch Transfer logs for [start, end] and extract the sales among them."""
+        from web3 import Web3
+
+        logs = await asyncio.to_thread(self.api.get_transfer_logs,
+                                       Web3.to_checksum_address(
+                                           self.collection), start, end)
+        sales = []
+        for log in logs:
+            try:
+                sale = await asyncio.to_thread(self.api.extract_sale, log)
+            except Exception as e:
+                logger.error(
+                    f"Backfill failed to decode log in block {log.block_number}: {str(e)}")
+                continue
+            if sale:
+                sales.append(sale.to_dict())
+        return len(logs), sales
+
+    def _record(self, sales):
+        # Chunks past next_block are rescanned on resume; count only new sales
+        written = append_sales(self.collection, sales)
+        volume = Decimal(self.checkpoint["volume"])
+        for sale in written:
+            if sale["price"]:
+                volume += Decimal(str(sale["price"]))
+        self.checkpoint["sales_found"] += len(written)
+        self.checkpoint["volume"] = str(volume)
+
+    async def run(self, progress=None):
+        """Scan the whole range, storing sales and checkpointing as chunks complete.
+
+        Args:
+            progress: Optional callable receiving the checkpoint after each chunk.
+
+        Returns:
+            dict: The final checkpoint, plus elapsed seconds.
+        """
+        started = time.monotonic()
+        to_block = self.checkpoint["to_block"]
+        cursor = self.checkpoint["next_block"]
+        completed = {}  # start block -> end block of finished chunks
+        retry = deque()
+        attempts = {}
+        ranges = {}
+
+        while cursor <= to_block or retry or ranges:
+            while len(ranges) < self.concurrency and (retry
+                                                      or cursor <= to_block):
+                if retry:
+                    start, end = retry.popleft()
+                else:
+                    start = cursor
+                    end = min(cursor + self.chunk_size - 1, to_block)
+                    cursor = end + 1
+                ranges[asyncio.create_task(self._scan_range(start,
+                                                            end))] = (start,
+                                                                      end)
+
+            done, _ = await asyncio.wait(ranges,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                start, end = ranges.pop(task)
+                try:
+                    log_count, sales = task.result()
+                except Exception as e:
+                    if is_too_many_results(e) and end > start:
+                        # Split the rejected range, shrink future chunks and never
+                        # grow back to a size the provider has already rejected
+                        mid = (start + end) // 2
+                        self.max_chunk = max(self.min_chunk,
+                                             min(self.max_chunk, end - start))
+                        self.chunk_size = max(self.min_chunk,
+                                              (end - start + 1) // 2)
+                        retry.extendleft([(mid + 1, end), (start, mid)])
+                        logger.info(
+                            f"Backfill chunk {start}-{end} too large; chunk size now {self.chunk_size}")
+                        continue
+                    attempts[(start, end)] = attempts.get((start, end), 0) + 1
+                    if attempts[(start, end)] >= self.max_attempts:
+                        for pending in ranges:
+                            pending.cancel()
+                        save_checkpoint(self.checkpoint)
+                        raise
+                    logger.warning(
+                        f"Backfill chunk {start}-{end} failed ({str(e)}); retrying")
+                    await asyncio.sleep(2**attempts[(start, end)])
+                    retry.append((start, end))
+                    continue
+
+                if log_count < self.small_result:
+                    self.chunk_size = min(self.max_chunk, self.chunk_size * 2)
+                self._record(sales)
+                completed[start] = end
+                while self.checkpoint["next_block"] in completed:
+                    self.checkpoint["next_block"] = completed.pop(
+                        self.checkpoint["next_block"]) + 1
+                save_checkpoint(self.checkpoint)
+                if progress:
+                    progress(self.checkpoint)
+
+        clear_checkpoint(self.collection)
+        logger.info(
+            f"Backfill of {self.collection} finished: {self.checkpoint['sales_found']} sales")
+        return dict(self.checkpoint, elapsed=time.monotonic() - started)
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_FILE = "./data/command_fingerprint.json"
+
+
+def build_command_payload(bot):
+    """Serialize the loaded app_commands tree exactly as Discord receives it."""
+    payload = []
+    for command in bot.tree.get_commands():
+        try:
+            payload.append(command.to_dict(bot.tree))  # discord.py >= 2.4
+        except TypeError:
+            payload.append(command.to_dict())
+    return sorted(payload, key=lambda c: c["name"])
+
+
+def command_fingerprint(bot, payload):
+    """Hash the command payload together with the application it belongs to."""
+    blob = json.dumps({
+        "application_id": bot.application_id,
+        "commands": payload
+    },
+                      sort_keys=True,
+                      default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def load_fingerprint():
+    if not os.path.exists(FINGERPRINT_FILE):
+        return None
+    try:
+        with open(FINGERPRINT_FILE, "r") as f:
+            return json.load(f).get("fingerprint")
+    except (json.JSONDecodeError, AttributeError) as e:
+        logger.error(f"Invalid command fingerprint file: {e}")
+        return None
+
+
+def save_fingerprint(fingerprint, names):
+    os.makedirs(os.path.dirname(FINGERPRINT_FILE), exist_ok=True)
+    tmp_path = f"{FINGERPRINT_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"fingerprint": fingerprint, "commands": names}, f, indent=4)
+    os.replace(tmp_path, FINGERPRINT_FILE)
+
+
+async def sync_commands_if_changed(bot, force=False):
+    """Bulk-overwrite global slash commands only when the local tree changed.
+
+    Args:
+        bot: The bot whose tree is registered.
+        force: Skip the fingerprint comparison and always sync.
+
+    Returns:
+        list: Names of the synced commands, or None if nothing was sent.
+    """
+    payload = build_command_payload(bot)
+    fingerprint = command_fingerprint(bot, payload)
+    if not force and fingerprint == load_fingerprint():
+        logger.info(
+            f"Slash commands unchanged ({len(payload)} commands); skipping registration")
+        return None
+
+    # One PUT replaces the whole global command set
+    synced = await bot.tree.sync()
+    names = [command.name for command in synced or []]
+    save_fingerprint(fingerprint, names)
+    logger.info(f"Registered {len(names)} slash commands: {', '.join(names)}")
+    return names
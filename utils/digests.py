@@ -0,0 +1,344 @@
+import asyncio
+import base64
+import hashlib
+import heapq
+import json
+import math
+import os
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from utils.subscriptions import load_tracked_collections, get_subscriptions
+
+logger = logging.getLogger(__name__)
+
+DIGEST_FILE = "./data/digests.json"
+FREQUENCIES = ("daily", "weekly")
+TOP_SALES = 3  # Largest sales kept per collection and period
+
+
+class HyperLogLog:
+    """Approximate distinct counter in a fixed 2**p bytes.
+
+    With the default p=10 (1 KB) the standard error is about 3%, whether a
+    collection has ten buyers or a million, so no per-wallet sets are kept.
+    Small counts fall back to linear counting and are close to exact.
+    """
+
+    def __init__(self, p=10, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers else bytearray(
+            self.m)
+
+    def add(self, value):
+        """Add a bytes value (e.g. a 20-byte wallet address)."""
+        x = int.from_bytes(
+            hashlib.blake2b(value, digest_size=8).digest(), "big")
+        index = x >> (64 - self.p)
+        rest = (x << self.p) & 0xFFFFFFFFFFFFFFFF
+        rank = min(64 - rest.bit_length(), 64 - self.p) + 1  # Leading zeros + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0**-r
+                                                 for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return round(estimate)
+
+    def merge(self, other):
+        for i, rank in enumerate(other.registers):
+            if rank > self.registers[i]:
+                self.registers[i] = rank
+
+    def to_text(self):
+        return base64.b64encode(bytes(self.registers)).decode()
+
+    @classmethod
+    def from_text(cls, text, p=10):
+        return cls(p, base64.b64decode(text))
+
+
+class PeriodAggregate:
+    """Running totals of one collection over one digest period.
+
+    Updated per sale in O(1) (plus a heap push for the top sales), so a digest
+    never has to replay stored sales.
+    """
+
+    def __init__(self):
+        self.sales = 0
+        self.volume = Decimal(0)
+        self.top = []  # Min-heap of (price, token_id, tx_hash), at most TOP_SALES
+        self.buyers = HyperLogLog()
+        self.floors = {}  # Bucket (hour or day) -> lowest sale price in it
+
+    def add(self, token_id, price, buyer, tx_hash, bucket):
+        self.sales += 1
+        if price:
+            self.volume += price
+            entry = (price, str(token_id), tx_hash)
+            if len(self.top) < TOP_SALES:
+                heapq.heappush(self.top, entry)
+            elif entry > self.top[0]:
+                heapq.heapreplace(self.top, entry)
+            if bucket not in self.floors or price < self.floors[bucket]:
+                self.floors[bucket] = price
+        self.buyers.add(buyer)
+
+    def top_sales(self):
+        return sorted(self.top, reverse=True)
+
+    def floor_trend(self):
+        """Return (first, last) lowest sale prices of the period, or None without priced sales."""
+        if not self.floors:
+            return None
+        buckets = sorted(self.floors)
+        return self.floors[buckets[0]], self.floors[buckets[-1]]
+
+    def to_dict(self):
+        return {
+            "sales": self.sales,
+            "volume": str(self.volume),
+            "top": [[str(p), t, h] for p, t, h in self.top],
+            "buyers": self.buyers.to_text(),
+            "floors": {b: str(p) for b, p in self.floors.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregate = cls()
+        aggregate.sales = data["sales"]
+        aggregate.volume = Decimal(data["volume"])
+        aggregate.top = [(Decimal(p), t, h) for p, t, h in data["top"]]
+        heapq.heapify(aggregate.top)
+        aggregate.buyers = HyperLogLog.from_text(data["buyers"])
+        aggregate.floors = {b: Decimal(p) for b, p in data["floors"].items()}
+        return aggregate
+
+
+def period_key(frequency, at):
+    """Key of the UTC period containing `at`: the date, or the week's Monday."""
+    day = at.date()
+    if frequency == "weekly":
+        day -= timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+class DigestStore:
+    """Aggregates per frequency, period and collection, persisted to one JSON file.
+
+    Each frequency remembers the last period it posted; a sale from a block in
+    a period already posted (detected after midnight, or replayed on resume)
+    counts toward the current period instead of re-opening the closed one.
+    With path=None the store is kept in memory only (replay and benchmarks).
+    """
+
+    def __init__(self, path=DIGEST_FILE):
+        self.path = path
+        self.periods = {frequency: {} for frequency in FREQUENCIES}
+        self.posted = {frequency: None for frequency in FREQUENCIES}  # Last posted key
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not load digests from {self.path}: {e}")
+            return
+        for frequency in FREQUENCIES:
+            self.periods[frequency] = {
+                key: {
+                    collection: PeriodAggregate.from_dict(aggregate)
+                    for collection, aggregate in collections.items()
+                }
+                for key, collections in data.get(frequency, {}).items()
+            }
+        self.posted.update(data.get("posted", {}))
+
+    def save(self):
+        """Write atomically so a crash never leaves a half-written file."""
+        if not self.path:
+            self.dirty = False
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            frequency: {
+                key: {
+                    collection: aggregate.to_dict()
+                    for collection, aggregate in collections.items()
+                }
+                for key, collections in periods.items()
+            }
+            for frequency, periods in self.periods.items()
+        }
+        data["posted"] = self.posted
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def save_if_dirty(self):
+        if self.dirty:
+            self.save()
+
+    def record_sale(self, collection, token_id, price, buyer, tx_hash,
+                    at=None):
+        """Fold one sale into the current daily and weekly aggregates.
+
+        Args:
+            collection: Lowercase collection address.
+            buyer: Buyer address as bytes (hashed into the unique-buyer sketch).
+            at: Unix time of the sale (block time), defaults to now.
+        """
+        now = datetime.now(timezone.utc)
+        block_at = datetime.fromtimestamp(at, timezone.utc) if at else now
+        for frequency in FREQUENCIES:
+            at = block_at
+            posted = self.posted[frequency]
+            if posted is not None and period_key(frequency, at) <= posted:
+                at = now  # Late for a digest already posted
+            bucket = at.strftime("%H") if frequency == "daily" else at.date(
+            ).isoformat()
+            collections = self.periods[frequency].setdefault(
+                period_key(frequency, at), {})
+            aggregate = collections.get(collection)
+            if aggregate is None:
+                aggregate = collections[collection] = PeriodAggregate()
+            aggregate.add(token_id, price, buyer, tx_hash, bucket)
+        self.dirty = True
+
+    def completed_periods(self, now=None):
+        """Return [(frequency, key, {collection: aggregate})] for periods that have ended."""
+        now = now or datetime.now(timezone.utc)
+        completed = []
+        for frequency in FREQUENCIES:
+            current = period_key(frequency, now)
+            for key in sorted(self.periods[frequency]):
+                if key < current:
+                    completed.append(
+                        (frequency, key, self.periods[frequency][key]))
+        return completed
+
+    def discard(self, frequency, key):
+        """Drop a posted period; later sales from it go to the current period."""
+        self.periods[frequency].pop(key, None)
+        if self.posted[frequency] is None or key > self.posted[frequency]:
+            self.posted[frequency] = key
+        self.dirty = True
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = DigestStore()
+    return _store
+
+
+def digest_channels(tracked_collections, frequency):
+    """Return {channel_id: [collection addresses]} of channels subscribed to a digest frequency."""
+    channels = {}
+    for collection, entry in tracked_collections.get("abstract", {}).items():
+        for subscription in get_subscriptions(entry):
+            if subscription.get("digest") == frequency:
+                channels.setdefault(subscription["channel_id"],
+                                    []).append(collection)
+    return channels
+
+
+def _short(address):
+    return f"{address[:6]}...{address[-4:]}"
+
+
+def render_digest(frequency, key, aggregates, collections):
+    """Build one digest embed covering every collection a channel follows."""
+    import discord
+
+    title = "📊 Daily digest" if frequency == "daily" else "📊 Weekly digest"
+    period = key if frequency == "daily" else f"week of {key}"
+    embed = discord.Embed(title=f"{title} — {period}",
+                          color=discord.Color.blurple())
+    for collection in collections[:25]:  # Discord's field limit
+        aggregate = aggregates.get(collection)
+        if aggregate is None or not aggregate.sales:
+            embed.add_field(name=_short(collection),
+                            value="No sales",
+                            inline=False)
+            continue
+        lines = [
+            f"Sales: **{aggregate.sales}** · Volume: **{aggregate.volume.normalize()} ABS** · "
+            f"Unique buyers: **~{aggregate.buyers.count()}**"
+        ]
+        top = aggregate.top_sales()
+        if top:
+            lines.append("Top: " + ", ".join(
+                f"[#{token_id}](https://abscan.org/tx/{tx_hash}) {price.normalize()} ABS"
+                for price, token_id, tx_hash in top))
+        trend = aggregate.floor_trend()
+        if trend:
+            first, last = trend
+            change = f" ({(last - first) / first * 100:+.0f}%)" if first else ""
+            lines.append(
+                f"Floor: {first.normalize()} → {last.normalize()} ABS{change}")
+        embed.add_field(name=_short(collection),
+                        value="\n".join(lines),
+                        inline=False)
+    return embed
+
+
+async def post_due_digests(bot, store=None, now=None):
+    """Post every completed period to its subscribed channels, then drop its aggregates.
+
+    Returns:
+        int: Digest messages sent.
+    """
+    store = store or get_store()
+    sent = 0
+    completed = store.completed_periods(now)
+    if not completed:
+        return 0
+    tracked_collections = load_tracked_collections()
+    for frequency, key, aggregates in completed:
+        for channel_id, collections in digest_channels(tracked_collections,
+                                                       frequency).items():
+            channel = bot.get_channel(channel_id)
+            if channel is None:
+                logger.error(f"Digest channel {channel_id} not found")
+                continue
+            try:
+                await channel.send(embed=render_digest(
+                    frequency, key, aggregates, collections))
+                sent += 1
+            except Exception as e:
+                logger.error(
+                    f"Failed to post {frequency} digest to channel {channel_id}: {str(e)}")
+        store.discard(frequency, key)
+        logger.info(f"Posted {frequency} digest for {key}")
+    store.save_if_dirty()
+    return sent
+
+
+async def run_digests(bot, interval=60):
+    """Background task next to monitor_sales: persist aggregates and post finished periods."""
+    store = get_store()
+    while True:
+        try:
+            await post_due_digests(bot, store)
+            store.save_if_dirty()
+        except Exception as e:
+            logger.error(f"Error in run_digests: {str(e)}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+import signal
+import time
+import logging
+
+import config
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "./data/state.json"
+CHECKPOINT_INTERVAL = 30  # Seconds between periodic checkpoints
+
+
+def load_state(path=STATE_FILE):
+    """Return the last checkpoint, or None if there is none or it is unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Ignoring unreadable checkpoint {path}: {e}")
+        return None
+
+
+def save_state(state, path=STATE_FILE):
+    """Write a checkpoint atomically: readers see the old or the new file, never half of one."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(dict(state, saved_at=time.time()), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def install_signal_handlers(callback):
+    """Call `callback` on SIGINT/SIGTERM instead of letting the loop be torn down mid-sale."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, callback)
+        except (NotImplementedError, RuntimeError):
+            pass  # Not supported on Windows; Ctrl+C still interrupts
+
+
+class Lifecycle:
+    """Owns the bot's background tasks, its checkpoints and an orderly shutdown.
+
+    Tasks are started by name, so a second on_ready after a gateway reconnect
+    finds the monitor already running instead of starting another one.
+    Shutdown stops the AbstractAPI, lets "drain" tasks finish the sale in hand
+    (and its Discord sends), cancels the rest, then checkpoints the cursor,
+    dedup window and digest aggregates.
+    """
+
+    def __init__(self, state_file=STATE_FILE):
+        self.state_file = state_file
+        self.tasks = {}  # name -> asyncio.Task
+        self.drain = set()  # Names of tasks awaited rather than cancelled
+        self.api = None
+        self._shutdown = None  # Future of the one shutdown in progress or done
+
+    def start_task(self, name, factory, drain=False):
+        """Start factory() as a named task unless one by that name is still running."""
+        task = self.tasks.get(name)
+        if task is not None and not task.done():
+            logger.info(f"{name} already running; not starting another")
+            return task
+        if self._shutdown is not None and self._shutdown.done():
+            self._shutdown = None  # Started again after a shutdown (main's login retry)
+        task = asyncio.get_running_loop().create_task(factory(), name=name)
+        self.tasks[name] = task
+        if drain:
+            self.drain.add(name)
+        return task
+
+    def attach(self, api):
+        """Resume an AbstractAPI from the last checkpoint and keep checkpointing it."""
+        self.api = api
+        state = load_state(self.state_file)
+        if state:
+            api.restore_state(state)
+            logger.info(
+                f"Resumed from checkpoint: cursor {state.get('cursor')}, {len(api.processed_sales)} recent sales")
+        self.start_task("checkpoint", self.checkpoint_loop)
+
+    def checkpoint(self):
+        """Persist the attached API's cursor and dedup window, and the digest aggregates."""
+        from utils.digests import get_store
+
+        if self.api is not None:
+            try:
+                save_state(self.api.export_state(), self.state_file)
+            except OSError as e:
+                logger.error(f"Checkpoint failed: {str(e)}")
+        get_store().save_if_dirty()
+
+    async def checkpoint_loop(self):
+        while True:
+            await asyncio.sleep(CHECKPOINT_INTERVAL)
+            self.checkpoint()
+
+    async def shutdown(self, timeout=None):
+        """Drain, cancel and checkpoint. Every caller waits for the same, single shutdown."""
+        if self._shutdown is None:
+            self._shutdown = asyncio.ensure_future(self._shutdown_now(timeout))
+        await asyncio.shield(self._shutdown)
+
+    async def _shutdown_now(self, timeout):
+        timeout = config.SHUTDOWN_TIMEOUT if timeout is None else timeout
+        if self.api is not None:
+            self.api.stop()
+
+        draining = [
+            task for name, task in self.tasks.items()
+            if name in self.drain and not task.done()
+        ]
+        if draining:
+            logger.info(f"Draining {len(draining)} task(s), up to {timeout:.0f}s")
+            _, late = await asyncio.wait(draining, timeout=timeout)
+            if late:
+                logger.warning(
+                    f"{len(late)} task(s) did not drain in time; cancelling")
+
+        running = [task for task in self.tasks.values() if not task.done()]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+        self.checkpoint()
+        logger.info("Shutdown complete; state checkpointed")
+
+
+manager = Lifecycle()
@@ -0,0 +1,120 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+import config
+
+LOG_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Attributes every LogRecord has; anything else was passed via extra= and is a structured field
+_RECORD_ATTRS = set(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {
+        "message", "asctime", "taskName"
+    }
+
+_listener = None
+
+
+def record_fields(record):
+    """Return the structured fields attached to a record through extra=."""
+    return {
+        key: value
+        for key, value in record.__dict__.items() if key not in _RECORD_ATTRS
+    }
+
+
+class KeyValueFormatter(logging.Formatter):
+    """The classic bot.log line, with structured fields appended as key=value."""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}"
+                                   for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, structured fields included at the top level."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() formats and copies every record on the caller; here the
+    caller only resolves %-args (so later mutation can't change the message),
+    and tracebacks are rendered by the listener.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(filename=config.LOG_FILE, console=True):
+    """Route all logging through a queue to a background writer thread.
+
+    Loggers only enqueue records on the event loop; a QueueListener thread does
+    the formatting, rotating file writes and console output. Safe to call more
+    than once; only the first call configures logging.
+
+    Args:
+        filename: Log file path, or None to log to the console only.
+        console: Also write records to stderr.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if config.LOG_JSON else KeyValueFormatter(
+        LOG_FORMAT, datefmt=DATE_FORMAT)
+    handlers = [logging.StreamHandler()] if console else []
+    if filename:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        handlers.append(
+            logging.handlers.RotatingFileHandler(
+                filename,
+                maxBytes=config.LOG_MAX_BYTES,
+                backupCount=config.LOG_BACKUP_COUNT,
+                encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(config.LOG_LEVEL)
+    logging.getLogger('discord').setLevel(logging.INFO)
+
+    _listener = logging.handlers.QueueListener(log_queue,
+                                               *handlers,
+                                               respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+import logging
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def blocking_callsite(stack):
+    """Pick the innermost frame in this project's code, e.g. 'utils/api_handler.py:142 extract_sale'."""
+    for frame in reversed(stack):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(PROJECT_ROOT) and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.lineno} {frame.name}"
+    frame = stack[-1]
+    return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+
+
+class LoopMonitor:
+    """Measures event loop lag and reports the callsite of long stalls.
+
+    A heartbeat coroutine sleeps for `interval` and records how late it wakes
+    up. A watchdog thread notices when the heartbeat stops ticking for longer
+    than `threshold` and samples the loop thread's stack while it is still
+    blocked, so the report points at the synchronous call doing the blocking.
+    """
+
+    def __init__(self, interval=0.1, threshold=0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start monitoring the running event loop."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch,
+                                        name="loop-watchdog",
+                                        daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Loop monitor started (interval {self.interval * 1000:.0f}ms, threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self._heartbeat = now
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            metrics.LOOP_LAG_SECONDS.observe(lag)
+
+    def _watch(self):
+        reported = None  # Heartbeat value of the stall already reported
+        while not self._stop.wait(self.interval / 2):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat - self.interval
+            if stalled_for < self.threshold or reported == heartbeat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            reported = heartbeat
+            stack = traceback.extract_stack(frame)
+            callsite = blocking_callsite(stack)
+            self.stalls += 1
+            metrics.LOOP_STALLS.labels(callsite).inc()
+            logger.warning("event loop blocked",
+                           extra={
+                               "stalled_ms": round(stalled_for * 1000),
+                               "callsite": callsite,
+                               "stack": "".join(stack.format()[-8:])
+                           })
+
+    async def measure_lag(self):
+        """Current loop lag: the monitor's last sample, or a one-off measurement."""
+        if self.running:
+            return self.last_lag
+        started = time.monotonic()
+        await asyncio.sleep(0)
+        return time.monotonic() - started
+
+
+monitor = LoopMonitor()
@@ -0,0 +1,331 @@
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = []  # Every metric, in definition order
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+
+
+class _Metric:
+    """Base for a named metric family with optional labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def children(self):
+        """Return {label values: child} for every label combination seen."""
+        return dict(self._children)
+
+    def _default(self):
+        return self.labels() if not self.labelnames else None
+
+    def _label_text(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _Value:
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def total(self):
+        return sum(child.value for child in self._children.values())
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{self._label_text(values)} {child.value:g}"]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value):
+        self._default().set(value)
+
+    def value(self):
+        child = self._children.get(())
+        return child.value if child else None
+
+
+class _HistogramValue:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class _Timer:
+
+    def __init__(self, target):
+        self.target = target
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.target.observe(time.perf_counter() - self.started)
+        return False
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self,
+                 name,
+                 documentation,
+                 labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"), ),
+                                child.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(
+                f"{self.name}_bucket{self._label_text(values, [('le', le)])} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {child.sum:g}")
+        lines.append(
+            f"{self.name}_count{self._label_text(values)} {child.count}")
+        return lines
+
+
+def render():
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Sales pipeline metrics
+RPC_CALLS = Counter("abs_rpc_calls_total", "JSON-RPC requests sent",
+                    ("method", "endpoint"))
+RPC_ERRORS = Counter("abs_rpc_errors_total", "JSON-RPC requests that failed",
+                     ("method", "endpoint"))
+RPC_SECONDS = Histogram("abs_rpc_seconds", "JSON-RPC request latency",
+                        ("method", "endpoint"))
+LOGS_INGESTED = Counter("abs_logs_ingested_total",
+                        "Transfer logs received from the chain")
+SALES_DETECTED = Counter("abs_sales_detected_total",
+                         "Transfers classified as sales")
+SALES_POSTED = Counter("abs_sales_posted_total",
+                       "Sale messages delivered to Discord channels")
+SALES_FAILED = Counter("abs_sales_failed_total",
+                       "Sale messages that failed to send")
+DEDUP_HITS = Counter("abs_dedup_hits_total",
+                     "Logs skipped because the sale was already processed")
+DISCORD_SEND_SECONDS = Histogram("abs_discord_send_seconds",
+                                 "Latency of one Discord message send")
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "abs_discord_rate_limit_wait_seconds",
+    "Time spent waiting on Discord rate limits (429 retries and bucket sleeps)",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+BLOCK_HEAD = Gauge("abs_block_head", "Latest block number seen from the RPC")
+BLOCK_CURSOR = Gauge("abs_block_cursor", "Last block fully processed")
+BLOCK_LAG = Gauge("abs_block_lag", "Head block minus processed cursor")
+SALE_STAGE_SECONDS = Histogram(
+    "abs_sale_stage_seconds",
+    "Per-sale latency of each pipeline span (chain, classify, enrich, render, discord, total)",
+    ("stage", ),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+             120.0, 300.0))
+LOOP_LAG_SECONDS = Histogram("abs_loop_lag_seconds",
+                             "How late the event loop ran a scheduled wakeup",
+                             buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+                                      0.25, 0.5, 1.0, 2.5, 5.0))
+LOOP_STALLS = Counter("abs_loop_stalls_total",
+                      "Event loop stalls over the threshold, by blocking callsite",
+                      ("callsite", ))
+
+
+def rpc_metrics_middleware(endpoint):
+    """web3 middleware counting and timing every RPC request by method."""
+
+    def middleware(make_request, w3):
+
+        def record(method, params):
+            RPC_CALLS.labels(method, endpoint).inc()
+            started = time.perf_counter()
+            try:
+                response = make_request(method, params)
+            except Exception:
+                RPC_ERRORS.labels(method, endpoint).inc()
+                raise
+            finally:
+                RPC_SECONDS.labels(method, endpoint).observe(
+                    time.perf_counter() - started)
+            if isinstance(response, dict) and "error" in response:
+                RPC_ERRORS.labels(method, endpoint).inc()
+            return response
+
+        return record
+
+    return middleware
+
+
+def record_block_progress(head=None, cursor=None):
+    """Update head/cursor gauges and the lag between them."""
+    if head is not None:
+        BLOCK_HEAD.set(head)
+    if cursor is not None:
+        BLOCK_CURSOR.set(cursor)
+    if BLOCK_HEAD.value() is not None and BLOCK_CURSOR.value() is not None:
+        BLOCK_LAG.set(max(0, BLOCK_HEAD.value() - BLOCK_CURSOR.value()))
+
+
+class DiscordRateLimitFilter(logging.Filter):
+    """Turns discord.py's 429 retry log records into wait-time observations.
+
+    discord.py handles 429s internally and only reports them through the
+    discord.http logger. Exactly one record per retried 429 carries this
+    message, with the retry delay as the last format argument; the extra
+    global-limit notice and the "erroring instead" record are not waits.
+    """
+
+    MESSAGE = "responded with 429. Retrying in"
+
+    def filter(self, record):
+        if self.MESSAGE in str(record.msg) and record.args:
+            retry_after = record.args[-1]
+            if isinstance(retry_after, (int, float)):
+                RATE_LIMIT_WAIT_SECONDS.observe(float(retry_after))
+        return True
+
+
+def _count_bucket_sleeps():
+    """Observe discord.py's pre-emptive bucket sleeps, which are only logged at DEBUG."""
+    try:
+        from discord.http import Ratelimit
+    except ImportError:
+        return
+    refresh = Ratelimit._refresh
+    if getattr(refresh, "_counts_waits", False):
+        return
+
+    async def _refresh(self):
+        timeout = self._max_ratelimit_timeout
+        if not (timeout and self.reset_after > timeout):  # Else it raises, no wait
+            RATE_LIMIT_WAIT_SECONDS.observe(float(self.reset_after))
+        await refresh(self)
+
+    _refresh._counts_waits = True
+    Ratelimit._refresh = _refresh
+
+
+def install_discord_rate_limit_hook():
+    logging.getLogger("discord.http").addFilter(DiscordRateLimitFilter())
+    _count_bucket_sleeps()
+
+
+async def start_metrics_server(host, port):
+    """Serve /metrics over HTTP with aiohttp. Returns the runner, or None if disabled."""
+    if not port:
+        return None
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=render(),
+                            content_type="text/plain",
+                            charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return runner
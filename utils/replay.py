@@ -0,0 +1,384 @@
+"""Record-and-replay of RPC responses and Discord sends, plus a synthetic chain.
+
+Record (HTTP only, the WebSocket is skipped while recording):
+    RPC_RECORD_FILE=./data/fixtures/run.json python main.py
+Replay a fixture fully offline:
+    python -m utils.replay ./data/fixtures/run.json
+"""
+import argparse
+import asyncio
+import atexit
+import bisect
+import json
+import os
+import threading
+import logging
+
+from web3.providers.base import BaseProvider
+
+logger = logging.getLogger(__name__)
+
+recorder = None  # Active FixtureRecorder, if RPC_RECORD_FILE is set
+
+
+def _request_key(method, params):
+    return f"{method}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class FixtureRecorder:
+    """Collects raw RPC exchanges and Discord sends and writes them to one JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rpc = []
+        self.discord = []
+        self.tracked_collections = None  # Snapshot replay watches instead of the JSON file
+        self.start_state = None  # Cursor and dedup window the recorded run resumed from
+        self._lock = threading.Lock()
+
+    def record_rpc(self, method, params, response):
+        with self._lock:
+            self.rpc.append({
+                "method": method,
+                "params": params,
+                "response": response
+            })
+
+    def record_discord(self, channel_id, payload):
+        with self._lock:
+            self.discord.append({"channel_id": channel_id, "payload": payload})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            fixture = {
+                "tracked_collections": self.tracked_collections,
+                "start_state": self.start_state,
+                "rpc": list(self.rpc),
+                "discord": list(self.discord)
+            }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(fixture, f, default=str)
+        os.replace(tmp_path, self.path)
+        logger.info(
+            f"Saved fixture {self.path}: {len(fixture['rpc'])} RPC calls, {len(fixture['discord'])} Discord sends")
+
+
+def start_recording(path):
+    """Record every RPC response and Discord send until the process exits."""
+    global recorder
+    if recorder is None:
+        recorder = FixtureRecorder(path)
+        atexit.register(recorder.save)
+    return recorder
+
+
+def record_discord_send(channel_id, embed):
+    if recorder is not None:
+        recorder.record_discord(channel_id, {"embeds": [embed.to_dict()]})
+
+
+def load_fixture(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class RecordingProvider(BaseProvider):
+    """Forwards to a real provider and records each raw JSON-RPC response."""
+
+    def __init__(self, provider, fixture_recorder):
+        self.provider = provider
+        self.recorder = fixture_recorder
+
+    def make_request(self, method, params):
+        response = self.provider.make_request(method, params)
+        self.recorder.record_rpc(method, params, response)
+        return response
+
+    def is_connected(self, show_traceback=False):
+        return self.provider.is_connected(show_traceback)
+
+
+class ReplayProvider(BaseProvider):
+    """Serves recorded responses for identical requests, in recorded order.
+
+    Repeated identical requests (e.g. eth_blockNumber) get successive recorded
+    responses; once exhausted the last one keeps being returned.
+    """
+
+    def __init__(self, rpc_entries):
+        self._responses = {}
+        for entry in rpc_entries:
+            self._responses.setdefault(
+                _request_key(entry["method"], entry["params"]),
+                []).append(entry["response"])
+        self._positions = {}
+        self.calls = 0
+        self.misses = 0
+
+    def make_request(self, method, params):
+        self.calls += 1
+        key = _request_key(method, params)
+        responses = self._responses.get(key)
+        if not responses:
+            self.misses += 1
+            return {
+                "jsonrpc": "2.0",
+                "id": 0,
+                "error": {
+                    "code": -32601,
+                    "message": f"No recorded response for {method}"
+                }
+            }
+        position = self._positions.get(key, 0)
+        self._positions[key] = min(position + 1, len(responses) - 1)
+        return responses[position]
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+
+class SyntheticChain(BaseProvider):
+    """In-memory chain answering the RPC methods the bot uses.
+
+    Transfers are added with add_transfer; everything is generated on demand,
+    so scenarios with tens of thousands of logs stay cheap to build.
+    """
+
+    CHAIN_ID = 2741  # Abstract mainnet
+
+    def __init__(self, head=1000, block_time=1):
+        self.head = head
+        self.block_time = block_time
+        self.genesis_time = 1_700_000_000
+        self.logs = []  # Raw log dicts, in insertion order
+        self._logs_by_block = {}  # block -> raw logs, so getLogs only touches its range
+        self._blocks = []  # Sorted blocks that have logs
+        self.transactions = {}  # tx hash -> raw tx dict
+        self.calls = {}  # method -> count
+
+    @staticmethod
+    def _word(value):
+        return "0x" + format(value, "064x")
+
+    def _add_log(self, collection, topics, data, value_wei, buyer, block,
+                 tx_hash):
+        tx_hash = tx_hash or self._word(len(self.transactions) + 1)
+        if tx_hash not in self.transactions:
+            self.transactions[tx_hash] = {
+                "hash": tx_hash,
+                "blockNumber": hex(block),
+                "blockHash": self._word(block),
+                "from": buyer,
+                "to": collection,
+                "value": hex(value_wei),
+                "input": "0x",
+                "nonce": "0x0",
+                "gas": hex(21000),
+                "gasPrice": hex(1),
+                "transactionIndex": "0x0"
+            }
+        log = {
+            "address": collection,
+            "topics": topics,
+            "data": data,
+            "blockNumber": hex(block),
+            "blockHash": self._word(block),
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "logIndex": hex(len(self.logs)),
+            "removed": False
+        }
+        self.logs.append(log)
+        if block not in self._logs_by_block:
+            self._logs_by_block[block] = []
+            bisect.insort(self._blocks, block)
+        self._logs_by_block[block].append(log)
+        self.head = max(self.head, block)
+        return tx_hash
+
+    @staticmethod
+    def _address_topic(address):
+        return "0x" + "0" * 24 + address[2:].lower()
+
+    def add_transfer(self,
+                     collection,
+                     token_id,
+                     seller,
+                     buyer,
+                     value_wei,
+                     block,
+                     tx_hash=None):
+        """Add an ERC-721 Transfer log (and its transaction if new). Returns the tx hash."""
+        from utils.topics import TRANSFER_TOPIC
+
+        return self._add_log(collection, [
+            TRANSFER_TOPIC,
+            self._address_topic(seller),
+            self._address_topic(buyer),
+            self._word(token_id)
+        ], "0x", value_wei, buyer, block, tx_hash)
+
+    def add_transfer_batch(self,
+                           collection,
+                           token_ids,
+                           quantities,
+                           seller,
+                           buyer,
+                           value_wei,
+                           block,
+                           tx_hash=None):
+        """Add an ERC-1155 TransferSingle (one token) or TransferBatch log. Returns the tx hash."""
+        from utils.topics import TRANSFER_SINGLE_TOPIC, TRANSFER_BATCH_TOPIC
+
+        topics = [
+            TRANSFER_SINGLE_TOPIC if len(token_ids) == 1 else TRANSFER_BATCH_TOPIC,
+            self._address_topic(buyer),  # operator
+            self._address_topic(seller),
+            self._address_topic(buyer)
+        ]
+        if len(token_ids) == 1:
+            words = [token_ids[0], quantities[0]]
+        else:
+            # ABI head: offsets of both arrays, then each array as length + items
+            words = [64, 64 + 32 * (len(token_ids) + 1), len(token_ids)
+                     ] + list(token_ids) + [len(quantities)] + list(quantities)
+        data = "0x" + "".join(format(word, "064x") for word in words)
+        return self._add_log(collection, topics, data, value_wei, buyer, block,
+                             tx_hash)
+
+    def _get_logs(self, criteria):
+        from_block = int(criteria.get("fromBlock", "0x0"), 16)
+        to_block = criteria.get("toBlock", "latest")
+        to_block = self.head if to_block == "latest" else int(to_block, 16)
+        addresses = criteria.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {a.lower() for a in addresses} if addresses else None
+        topic0 = (criteria.get("topics") or [None])[0]
+        topic0 = {topic0} if isinstance(topic0, str) else set(topic0 or ())
+        start = bisect.bisect_left(self._blocks, from_block)
+        end = bisect.bisect_right(self._blocks, to_block)
+        return [
+            log for block in self._blocks[start:end]
+            for log in self._logs_by_block[block]
+            if (addresses is None or log["address"].lower() in addresses) and (
+                not topic0 or log["topics"][0] in topic0)
+        ]
+
+    def make_request(self, method, params):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if method == "eth_chainId":
+            result = hex(self.CHAIN_ID)
+        elif method == "eth_blockNumber":
+            result = hex(self.head)
+        elif method == "eth_getLogs":
+            result = self._get_logs(params[0])
+        elif method == "eth_getTransactionByHash":
+            result = self.transactions.get(params[0])
+        elif method == "eth_getBlockByNumber":
+            number = int(params[0], 16) if params[0] != "latest" else self.head
+            result = {
+                "number": hex(number),
+                "hash": self._word(number),
+                "timestamp": hex(self.genesis_time + number * self.block_time),
+                "transactions": []
+            }
+        else:
+            return {
+                "jsonrpc": "2.0",
+                "id": 0,
+                "error": {
+                    "code": -32601,
+                    "message": f"Method {method} not supported"
+                }
+            }
+        return {"jsonrpc": "2.0", "id": 0, "result": result}
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+
+class StubChannel:
+    """Stands in for a discord.TextChannel and keeps every embed sent to it."""
+
+    def __init__(self, channel_id, sent, delay=0.0):
+        self.id = channel_id
+        self.sent = sent
+        self.delay = delay
+
+    async def send(self, embed=None, **kwargs):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append({
+            "channel_id": self.id,
+            "payload": {
+                "embeds": [embed.to_dict()] if embed else []
+            }
+        })
+
+
+class StubBot:
+    """Minimal bot for sales_posting: resolves any channel ID to a StubChannel."""
+
+    def __init__(self, send_delay=0.0):
+        self.user = None
+        self.sent = []
+        self.send_delay = send_delay
+        self._channels = {}
+
+    def get_channel(self, channel_id):
+        if channel_id not in self._channels:
+            self._channels[channel_id] = StubChannel(channel_id, self.sent,
+                                                     self.send_delay)
+        return self._channels[channel_id]
+
+
+def offline_api(provider, stub_bot, tracked_collections):
+    """Build an AbstractAPI and posting path that never touch the network."""
+    from utils.api_handler import AbstractAPI
+    from utils.digests import DigestStore
+    from utils.wallet_labels import WalletLabelResolver
+    from utils import sales_posting
+
+    sales_posting.bot = stub_bot
+    # No name service and an in-memory digest store: nothing leaves the process
+    return AbstractAPI(http_provider=provider,
+                       tracked_collections=tracked_collections,
+                       digest_store=DigestStore(None),
+                       label_resolver=WalletLabelResolver())
+
+
+async def run_replay(path, polls=1):
+    """Replay a fixture through AbstractAPI and the posting path.
+
+    Returns:
+        dict: Discord sends produced, sends in the fixture, RPC calls and misses.
+    """
+    fixture = load_fixture(path)
+    provider = ReplayProvider(fixture["rpc"])
+    stub_bot = StubBot()
+    api = offline_api(provider, stub_bot, fixture.get("tracked_collections")
+                      or {"abstract": {}})
+    # Resume where the recording did, or the first poll asks for other blocks
+    api.restore_state(fixture.get("start_state") or {})
+    for _ in range(polls):
+        await api.fallback_poll_sales()
+    return {
+        "sent": stub_bot.sent,
+        "recorded_sends": len(fixture.get("discord", [])),
+        "rpc_calls": provider.calls,
+        "rpc_misses": provider.misses
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded fixture offline")
+    parser.add_argument("fixture")
+    parser.add_argument("--polls", type=int, default=1)
+    args = parser.parse_args()
+    result = asyncio.run(run_replay(args.fixture, args.polls))
+    print(f"Discord sends: {len(result['sent'])} (recorded {result['recorded_sends']})")
+    print(f"RPC calls: {result['rpc_calls']} ({result['rpc_misses']} without a recorded response)")
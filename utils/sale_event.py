@@ -0,0 +1,186 @@
+from utils.topics import TRANSFER_TOPIC, TRANSFER_SINGLE_TOPIC, TRANSFER_BATCH_TOPIC
+
+
+def _to_bytes(value):
+    """Raw bytes from an RPC hex string or a HexBytes/bytes value."""
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return bytes(value)
+
+
+def _to_int(value):
+    if value is None or isinstance(value, int):
+        return value
+    return int(value, 16)
+
+
+class SaleEvent:
+    """One token movement, decoded once from its log into a compact record.
+
+    Addresses and hashes are kept as raw bytes (20 and 32 bytes) instead of
+    the HexBytes topics and hex strings a web3 log carries; the *_hex
+    properties format them only when a sale is rendered, logged or stored.
+    Most Transfer logs in a mint-out are never sales, so they are never
+    formatted at all.
+    """
+
+    __slots__ = ("collection", "seller", "buyer", "token_id", "tx_hash",
+                 "block_number", "log_index", "quantity", "tx_units", "price")
+
+    def __init__(self,
+                 collection,
+                 seller,
+                 buyer,
+                 token_id,
+                 tx_hash,
+                 block_number=None,
+                 log_index=None,
+                 quantity=1,
+                 price=None):
+        self.collection = collection
+        self.seller = seller
+        self.buyer = buyer
+        self.token_id = token_id
+        self.tx_hash = tx_hash
+        self.block_number = block_number
+        self.log_index = log_index
+        self.quantity = quantity  # Always 1 for ERC-721
+        self.tx_units = quantity  # Tokens moved by the whole tx; set by decode_logs
+        self.price = price  # Set by AbstractAPI.extract_sale once classified
+
+    @property
+    def sale_id(self):
+        """Dedup key: one tx can move many tokens (sweeps, TransferBatch)."""
+        return (self.collection, self.tx_hash, self.log_index, self.token_id)
+
+    @property
+    def collection_hex(self):
+        return "0x" + self.collection.hex()
+
+    @property
+    def seller_hex(self):
+        return "0x" + self.seller.hex()
+
+    @property
+    def buyer_hex(self):
+        return "0x" + self.buyer.hex()
+
+    @property
+    def tx_hash_hex(self):
+        return "0x" + self.tx_hash.hex()
+
+    def to_dict(self):
+        """The sale as stored by sales_store and sent to shard workers."""
+        return {
+            "token_id": self.token_id,
+            "quantity": self.quantity,
+            "price": self.price,
+            "buyer": self.buyer_hex,
+            "seller": self.seller_hex,
+            "tx_hash": self.tx_hash_hex,
+            "block_number": self.block_number
+        }
+
+
+def _log_fields(log):
+    """Fields every event of a log shares: collection, tx hash, block and log index."""
+    return (_to_bytes(log["address"]), _to_bytes(log["transactionHash"]),
+            _to_int(log.get("blockNumber")), _to_int(log.get("logIndex")))
+
+
+def decode_transfer(log, topics):
+    """ERC-721 Transfer(from, to, tokenId): everything is in the topics."""
+    collection, tx_hash, block_number, log_index = _log_fields(log)
+    token_id = int.from_bytes(_to_bytes(topics[3]),
+                              "big") if len(topics) > 3 else None
+    return [
+        SaleEvent(collection,
+                  _to_bytes(topics[1])[-20:],
+                  _to_bytes(topics[2])[-20:], token_id, tx_hash,
+                  block_number, log_index)
+    ]
+
+
+def decode_transfer_single(log, topics):
+    """ERC-1155 TransferSingle(operator, from, to, id, value): id and value in data."""
+    collection, tx_hash, block_number, log_index = _log_fields(log)
+    data = memoryview(_to_bytes(log["data"]))
+    return [
+        SaleEvent(collection,
+                  _to_bytes(topics[2])[-20:],
+                  _to_bytes(topics[3])[-20:],
+                  int.from_bytes(data[0:32], "big"), tx_hash, block_number,
+                  log_index, int.from_bytes(data[32:64], "big"))
+    ]
+
+
+def _uint_array(data, offset):
+    """ABI-decode a uint256[] whose head word sits at `offset` in one pass over the slice."""
+    start = int.from_bytes(data[offset:offset + 32], "big")
+    count = int.from_bytes(data[start:start + 32], "big")
+    words = data[start + 32:start + 32 + 32 * count]
+    return [
+        int.from_bytes(words[i:i + 32], "big")
+        for i in range(0, len(words), 32)
+    ]
+
+
+def decode_transfer_batch(log, topics):
+    """ERC-1155 TransferBatch(operator, from, to, ids[], values[]): one event per token.
+
+    The shared fields are decoded once and the same bytes objects are reused by
+    every per-token event; ids and values are sliced out of a single memoryview.
+    """
+    collection, tx_hash, block_number, log_index = _log_fields(log)
+    seller = _to_bytes(topics[2])[-20:]
+    buyer = _to_bytes(topics[3])[-20:]
+    data = memoryview(_to_bytes(log["data"]))
+    token_ids = _uint_array(data, 0)
+    quantities = _uint_array(data, 32)
+    return [
+        SaleEvent(collection, seller, buyer, token_id, tx_hash, block_number,
+                  log_index, quantity)
+        for token_id, quantity in zip(token_ids, quantities)
+    ]
+
+
+# topic0 -> decoder returning the SaleEvents of one log
+TOPIC_DECODERS = {
+    TRANSFER_TOPIC: decode_transfer,
+    TRANSFER_SINGLE_TOPIC: decode_transfer_single,
+    TRANSFER_BATCH_TOPIC: decode_transfer_batch,
+}
+
+
+def decode_log(log):
+    """Dispatch a raw or web3-formatted log to its standard's decoder by topic0.
+
+    Returns:
+        list: SaleEvents for the log; empty if its topic0 is not an NFT transfer.
+    """
+    topics = log.get("topics")
+    if not topics:
+        return []
+    topic0 = topics[0]
+    topic0 = topic0.lower() if isinstance(topic0, str) else "0x" + bytes(
+        topic0).hex()
+    decoder = TOPIC_DECODERS.get(topic0)
+    return decoder(log, topics) if decoder else []
+
+
+def decode_logs(logs):
+    """Decode a batch of logs and record how many tokens each transaction moved.
+
+    A sweep or TransferBatch pays once for many tokens, so the transaction
+    value is split across its events by quantity (see AbstractAPI.extract_sale).
+
+    Returns:
+        list: SaleEvents of every log, in log order.
+    """
+    events = [event for log in logs for event in decode_log(log)]
+    units = {}
+    for event in events:
+        units[event.tx_hash] = units.get(event.tx_hash, 0) + event.quantity
+    for event in events:
+        event.tx_units = units[event.tx_hash]
+    return events
@@ -1,44 +1,153 @@
 import discord
 import asyncio
-from utils.api_handler import AbstractAPI
 import json
 import os
 import logging
+import config
+from utils import metrics
+from utils import tracing
+from utils.lifecycle import manager as lifecycle
 
-# Set up logging to match main.py
-logging.basicConfig(filename='./data/logs/bot.log',
-                    level=logging.INFO,
-                    format='%(asctime)s %(levelname)s: %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 
 DATA_FILE = "./data/tracked_collections.json"
 
+bot = None  # Set by monitor_sales; used to resolve channels when posting
 
-async def monitor_sales(bot):
+
+async def monitor_sales(discord_bot):
     """Monitor NFT sales in real-time and post to Discord channels."""
-    api = AbstractAPI()
+    from utils.api_handler import AbstractAPI  # Defers the web3 import until monitoring starts
+
+    global bot
+    bot = discord_bot
+    if config.RPC_RECORD_FILE:
+        # Record raw RPC responses (HTTP only) and Discord sends to a replayable fixture
+        from web3 import Web3
+        from utils import replay
+        fixture = replay.start_recording(config.RPC_RECORD_FILE)
+        api = AbstractAPI(http_provider=replay.RecordingProvider(
+            Web3.HTTPProvider(config.ABSTRACT_HTTP_RPC), fixture))
+        fixture.tracked_collections = api.tracked_collections
+        logger.info(f"Recording RPC and Discord traffic to {config.RPC_RECORD_FILE}")
+    else:
+        api = AbstractAPI()
+    lifecycle.attach(api)  # Resume cursor and dedup state from the last checkpoint
+    if config.RPC_RECORD_FILE:
+        fixture.start_state = api.export_state()
     logger.info("Starting sales monitoring for Abstract collections")
+    await run_sales_api(api)
+
+
+async def run_sales_api(api):
+    """Drive an AbstractAPI: real-time listening first, then periodic HTTP polling.
+
+    Returns once api.stop() is called, after the sale in hand has been posted.
+    """
+    if api.cursor is not None:
+        # Resumed from a checkpoint: poll the blocks missed while stopped first
+        await api.fallback_poll_sales()
     await api.listen_for_sales()  # Start real-time WebSocket monitoring
 
-    while True:
+    while not api.stopping:
         try:
             # Fallback polling (if WebSocket fails or for initial sync)
             await api.fallback_poll_sales()
-            await asyncio.sleep(60)  # Less frequent polling as backup
+            await api.wait_or_stop(60)  # Less frequent polling as backup
         except Exception as e:
             logger.error(f"Error in monitor_sales: {str(e)}")
-            await asyncio.sleep(10)  # Wait before retrying
+            await api.wait_or_stop(10)  # Wait before retrying
+    logger.info("Sales monitoring stopped")
+
+
+async def post_sale_to_discord(collection,
+                               token_id,
+                               price,
+                               buyer,
+                               seller,
+                               tx_hash,
+                               channel_ids,
+                               trace=None,
+                               quantity=1,
+                               buyer_label=None,
+                               seller_label=None):
+    """Render a sale embed once and fan it out to every subscribed channel.
 
+    If a SaleTrace is given it is stamped through enrichment, rendering and
+    Discord's acknowledgement, then aggregated into the latency histograms.
+    """
+    if isinstance(channel_ids, int):
+        channel_ids = [channel_ids]
 
-async def post_sale_to_discord(collection, token_id, price, buyer, seller,
-                               tx_hash, channel_id):
-    """Post a sale to the specified Discord channel with a rich embed."""
-    channel = bot.get_channel(channel_id)
-    if not channel:
-        logger.error(f"Channel {channel_id} not found")
+    channels = []
+    for channel_id in channel_ids:
+        channel = bot.get_channel(channel_id)
+        if channel:
+            channels.append(channel)
+        else:
+            logger.error(f"Channel {channel_id} not found")
+    if not channels:
         return
 
+    embed = await render_sale_embed(collection,
+                                    token_id,
+                                    price,
+                                    buyer,
+                                    seller,
+                                    tx_hash,
+                                    trace=trace,
+                                    quantity=quantity,
+                                    buyer_label=buyer_label,
+                                    seller_label=seller_label)
+
+    results = await asyncio.gather(
+        *(send_timed(channel, embed) for channel in channels),
+        return_exceptions=True)
+    if trace:
+        trace.mark("sent")
+        tracing.record(trace)
+    failed = []
+    for channel, result in zip(channels, results):
+        if isinstance(result, Exception):
+            failed.append(channel.id)
+            logger.error(
+                f"Failed to send sale to channel {channel.id}: {str(result)}")
+    metrics.SALES_POSTED.inc(len(channels) - len(failed))
+    metrics.SALES_FAILED.inc(len(failed))
+    # One compact record per sale, however many channels it fanned out to
+    logger.info("sale posted",
+                extra={
+                    "collection": collection,
+                    "token_id": token_id,
+                    "channels": len(channels) - len(failed),
+                    "failed": len(failed)
+                })
+
+
+async def send_timed(channel, embed):
+    """Send an embed, recording the Discord round trip."""
+    with metrics.DISCORD_SEND_SECONDS.time():
+        message = await channel.send(embed=embed)
+    if config.RPC_RECORD_FILE:
+        from utils import replay
+        replay.record_discord_send(channel.id, embed)
+    return message
+
+
+async def render_sale_embed(collection,
+                            token_id,
+                            price,
+                            buyer,
+                            seller,
+                            tx_hash,
+                            trace=None,
+                            quantity=1,
+                            buyer_label=None,
+                            seller_label=None):
+    """Build the rich embed for a sale; shared by every subscribed channel.
+
+    Wallets show their resolved label when one is given, else truncated hex.
+    """
     embed = discord.Embed(title="🎉 Abstract NFT Sale Detected!",
                           color=discord.Color.green(),
                           timestamp=discord.utils.utcnow())
@@ -46,6 +155,8 @@ async def post_sale_to_discord(collection, token_id, price, buyer, seller,
     # Add collection name (fetch from RPC if possible) or use address
     collection_name = await fetch_collection_name(
         collection) or f"{collection[:6]}...{collection[-4:]}"
+    if trace:
+        trace.mark("enriched")
     embed.add_field(name="Collection",
                     value=f"`{collection_name}`",
                     inline=True)
@@ -58,26 +169,35 @@ async def post_sale_to_discord(collection, token_id, price, buyer, seller,
         pass  # Skip if image fails
 
     embed.add_field(name="Token ID", value=f"#{token_id}", inline=True)
+    if quantity > 1:  # ERC-1155 transfers can move several copies of a token
+        embed.add_field(name="Quantity", value=str(quantity), inline=True)
     embed.add_field(name="Price",
                     value=f"{price} ABS" if price else "N/A",
                     inline=True)
     embed.add_field(name="Buyer",
-                    value=f"`{buyer[:6]}...{buyer[-4:]}`",
+                    value=wallet_display(buyer, buyer_label),
                     inline=True)
     embed.add_field(name="Seller",
-                    value=f"`{seller[:6]}...{seller[-4:]}`",
+                    value=wallet_display(seller, seller_label),
                     inline=True)
     embed.add_field(
         name="Transaction",
         value=f"[View on AbstractScan](https://abscan.org/tx/{tx_hash})",
         inline=False)
-    embed.set_footer(text=f"Tracked by {bot.user.name}",
-                     icon_url=bot.user.avatar.url if bot.user.avatar else None)
+    if bot and bot.user:  # Sharded workers post over REST without a gateway user
+        embed.set_footer(
+            text=f"Tracked by {bot.user.name}",
+            icon_url=bot.user.avatar.url if bot.user.avatar else None)
+    if trace:
+        trace.mark("rendered")
+    return embed
+
 
-    await channel.send(embed=embed)
-    logger.info(
-        f"Sale notification sent to channel {channel_id} for collection {collection}, token {token_id}"
-    )
+def wallet_display(address, label=None):
+    """A wallet's label (markdown-escaped, it may come from a name service) or truncated hex."""
+    if label:
+        return discord.utils.escape_markdown(label)
+    return f"`{address[:6]}...{address[-4:]}`"
 
 
 async def fetch_collection_name(collection_address):
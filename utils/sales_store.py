@@ -0,0 +1,66 @@
+import json
+import os
+import logging
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+SALES_DIR = "./data/sales"
+
+_known_keys = {}  # collection -> {(tx_hash, token_id)} already on disk
+
+
+def _sales_file(collection):
+    return os.path.join(SALES_DIR, f"{collection.lower()}.jsonl")
+
+
+def _sale_key(sale):
+    return (sale["tx_hash"], str(sale["token_id"]))
+
+
+def load_sales(collection):
+    """Return every stored sale of a collection, oldest first as written."""
+    path = _sales_file(collection)
+    if not os.path.exists(path):
+        return []
+    sales = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                sales.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping corrupt line in {path}: {e}")
+    return sales
+
+
+def _keys_for(collection):
+    collection = collection.lower()
+    if collection not in _known_keys:
+        _known_keys[collection] = {_sale_key(s) for s in load_sales(collection)}
+    return _known_keys[collection]
+
+
+def append_sales(collection, sales):
+    """Append sales to a collection's JSON-lines file, skipping ones already stored.
+
+    Returns:
+        list: The records actually written, so callers total only new sales.
+    """
+    os.makedirs(SALES_DIR, exist_ok=True)
+    known = _keys_for(collection)
+    written = []
+    with open(_sales_file(collection), "a") as f:
+        for sale in sales:
+            key = _sale_key(sale)
+            if key in known:
+                continue
+            record = dict(sale, collection=collection.lower())
+            if isinstance(record.get("price"), Decimal):
+                record["price"] = str(record["price"])
+            f.write(json.dumps(record) + "\n")
+            known.add(key)
+            written.append(record)
+    return written
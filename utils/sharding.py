@@ -0,0 +1,238 @@
+"""Sharded mode: one ingestion process routing sales to N posting worker processes.
+
+Run with: python -m utils.sharding --workers 4
+"""
+import argparse
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import signal
+
+import aiohttp
+
+import config
+from utils import metrics
+from utils.logging_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes."""
+
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self._keys = []  # Sorted hash positions
+        self._ring = {}  # Hash position -> node
+        for node in nodes:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def add_node(self, node):
+        for i in range(self.replicas):
+            position = self._hash(f"{node}#{i}")
+            self._ring[position] = node
+            bisect.insort(self._keys, position)
+
+    def remove_node(self, node):
+        for i in range(self.replicas):
+            position = self._hash(f"{node}#{i}")
+            if self._ring.pop(position, None) is not None:
+                self._keys.remove(position)
+
+    def get_node(self, key):
+        """Return the node owning key, or None if the ring is empty."""
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, self._hash(key.lower()))
+        return self._ring[self._keys[index % len(self._keys)]]
+
+    @property
+    def nodes(self):
+        return set(self._ring.values())
+
+
+async def send_embed_rest(session, channel_id, embed_dict, api_base=None):
+    """POST an embed to a channel over the Discord REST API, honouring 429 retry_after.
+
+    Args:
+        api_base: Discord API root to use instead of DISCORD_API_BASE (soak tests).
+    """
+    url = f"{api_base or config.DISCORD_API_BASE}/channels/{channel_id}/messages"
+    headers = {'Authorization': f'Bot {config.BOT_TOKEN}'}
+    for _ in range(5):
+        with metrics.DISCORD_SEND_SECONDS.time():
+            async with session.post(url,
+                                    headers=headers,
+                                    json={"embeds": [embed_dict]}) as response:
+                status = response.status
+                body = await response.json() if status == 429 else None
+        if status == 429:
+            retry_after = float(body.get("retry_after", 1))
+            metrics.RATE_LIMIT_WAIT_SECONDS.observe(retry_after)
+            logger.warning(
+                f"Rate limited posting to {channel_id}; retrying in {retry_after}s")
+            await asyncio.sleep(retry_after)
+            continue
+        if status >= 400:
+            metrics.SALES_FAILED.inc()
+            logger.error(
+                f"Posting to channel {channel_id} failed: HTTP {status}")
+        else:
+            metrics.SALES_POSTED.inc()
+        return status
+    return 429
+
+
+async def _worker_loop(worker_id, queue):
+    from utils.sales_posting import render_sale_embed
+    from utils import tracing
+
+    loop = asyncio.get_running_loop()
+    async with aiohttp.ClientSession() as session:
+        while True:
+            sale = await loop.run_in_executor(None, queue.get)
+            if sale is None:  # Shutdown sentinel
+                break
+            try:
+                trace = tracing.SaleTrace.from_dict(sale.get("trace"),
+                                                    sale["collection"],
+                                                    sale["token_id"])
+                embed = await render_sale_embed(sale["collection"],
+                                                sale["token_id"],
+                                                sale["price"],
+                                                sale["buyer"],
+                                                sale["seller"],
+                                                sale["tx_hash"],
+                                                trace=trace,
+                                                quantity=sale.get(
+                                                    "quantity", 1),
+                                                buyer_label=sale.get(
+                                                    "buyer_label"),
+                                                seller_label=sale.get(
+                                                    "seller_label"))
+                embed_dict = embed.to_dict()
+                await asyncio.gather(*(send_embed_rest(
+                    session, channel_id, embed_dict)
+                                       for channel_id in sale["channel_ids"]))
+                trace.mark("sent")
+                tracing.record(trace)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} failed to post sale: {str(e)}")
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def run_worker(worker_id, queue):
+    """Entry point of a posting worker process."""
+    # Each process gets its own file; rotating one file from several processes is unsafe
+    setup_logging(config.LOG_FILE.replace(".log", f"-worker{worker_id}.log"))
+    # Ctrl+C reaches the whole process group; the ingestion process stops
+    # workers with the queue sentinel once it has routed its last sale
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_IGN)
+    asyncio.run(_worker_loop(worker_id, queue))
+
+
+class ShardRouter:
+    """Routes sales from the ingestion process to worker queues via a HashRing."""
+
+    def __init__(self, num_workers, ctx=None):
+        self.ctx = ctx or multiprocessing.get_context("spawn")
+        self.queues = {}
+        self.processes = {}
+        self.ring = HashRing()
+        for worker_id in range(num_workers):
+            self.add_worker(worker_id)
+
+    def add_worker(self, worker_id):
+        queue = self.ctx.Queue()
+        process = self.ctx.Process(target=run_worker,
+                                   args=(worker_id, queue),
+                                   daemon=True)
+        process.start()
+        self.queues[worker_id] = queue
+        self.processes[worker_id] = process
+        self.ring.add_node(worker_id)
+        logger.info(f"Started posting worker {worker_id} (pid {process.pid})")
+
+    def remove_worker(self, worker_id):
+        self.ring.remove_node(worker_id)
+        queue = self.queues.pop(worker_id, None)
+        process = self.processes.pop(worker_id, None)
+        if process and process.is_alive():
+            queue.put(None)
+            process.join(timeout=10)
+            if process.is_alive():
+                # Workers ignore SIGTERM, so terminate() would not stop them
+                logger.warning(f"Worker {worker_id} did not drain in time; killing it")
+                process.kill()
+                process.join()
+        logger.info(f"Removed posting worker {worker_id}")
+
+    def prune_dead_workers(self):
+        """Drop crashed workers from the ring; only their collections move."""
+        for worker_id, process in list(self.processes.items()):
+            if not process.is_alive():
+                logger.error(
+                    f"Worker {worker_id} exited with code {process.exitcode}")
+                self.remove_worker(worker_id)
+
+    async def dispatch(self, sale):
+        """AbstractAPI sale_sink: enqueue a sale on its owning worker."""
+        worker_id = self.ring.get_node(sale["collection"])
+        if worker_id is None:
+            logger.error("No posting workers available; dropping sale")
+            return
+        self.queues[worker_id].put(sale)
+
+    def shutdown(self):
+        for worker_id in list(self.processes):
+            self.remove_worker(worker_id)
+
+
+async def run_sharded(num_workers):
+    """Run the ingestion loop in this process and post from num_workers workers."""
+    from utils.api_handler import AbstractAPI
+    from utils.sales_posting import run_sales_api
+    from utils.lifecycle import manager as lifecycle, install_signal_handlers
+
+    router = ShardRouter(num_workers)
+    api = AbstractAPI(sale_sink=router.dispatch)
+    lifecycle.attach(api)
+    # Ingestion metrics only; each worker counts its own sends in-process
+    metrics_runner = await metrics.start_metrics_server(
+        config.METRICS_HOST, config.METRICS_PORT)
+
+    async def watch_workers():
+        while True:
+            router.prune_dead_workers()
+            await asyncio.sleep(5)
+
+    watcher = asyncio.create_task(watch_workers())
+    ingest = lifecycle.start_task("monitor_sales",
+                                  lambda: run_sales_api(api),
+                                  drain=True)
+    install_signal_handlers(lambda: asyncio.ensure_future(lifecycle.shutdown()))
+    try:
+        await asyncio.gather(ingest, return_exceptions=True)
+    finally:
+        watcher.cancel()
+        await lifecycle.shutdown()
+        # Workers get their shutdown sentinel behind every queued sale, so queues drain first
+        router.shutdown()
+        if metrics_runner:
+            await metrics_runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the sales bot with sharded posting workers")
+    parser.add_argument("--workers", type=int, default=config.SHARD_WORKERS)
+    args = parser.parse_args()
+    setup_logging()
+    asyncio.run(run_sharded(args.workers))
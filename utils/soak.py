@@ -0,0 +1,419 @@
+"""Soak test: the real ingestion and posting path against local stub RPC and Discord servers.
+
+Run from the CLI:
+    python -m utils.soak --collections 50 --channels 10 --rate 20 --duration 300
+or as the bot owner with `!soak [duration] [collections] [channels] [rate]`,
+which starts the same CLI as a child process: the run's metrics, logs and
+caches never touch the live bot's.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes():
+    """Current resident set size, falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _round(seconds):
+    return None if seconds is None else round(seconds, 4)
+
+
+class StubRPC:
+    """JSON-RPC over HTTP in front of a SyntheticChain, served from its own thread.
+
+    web3's HTTP provider blocks the calling thread, so the stub must not share
+    the bot's event loop. `lock` guards the chain against the traffic generator.
+    """
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(
+                    self.headers["Content-Length"])))
+                calls = body if isinstance(body, list) else [body]
+                replies = []
+                with stub.lock:
+                    for call in calls:
+                        reply = stub.chain.make_request(call["method"],
+                                                        call.get("params", []))
+                        replies.append(dict(reply, id=call.get("id")))
+                data = json.dumps(
+                    replies if isinstance(body, list) else replies[0]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever,
+                         name="soak-rpc",
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubDiscord:
+    """Discord REST stand-in recording every message, on its own thread and loop.
+
+    Adds `latency` to each request and answers every `rate_limit_every`-th one
+    with a 429, so the retry path is exercised too.
+    """
+
+    def __init__(self, latency=0.05, rate_limit_every=0):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.received = []  # (received_at, channel_id, tx_hash)
+        self.requests = 0
+        self.rate_limited = 0
+        self.url = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._loop = None
+        self._stop = None
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        with self._lock:
+            self.requests += 1
+            limited = self.rate_limit_every and self.requests % self.rate_limit_every == 0
+            if limited:
+                self.rate_limited += 1
+        await asyncio.sleep(self.latency)
+        if limited:
+            return web.json_response({"retry_after": 0.05, "global": False},
+                                     status=429)
+        body = await request.json()
+        tx_hash = None
+        for field in body["embeds"][0].get("fields", []):
+            if field["name"] == "Transaction":
+                tx_hash = field["value"].rsplit("/tx/", 1)[-1].rstrip(")")
+        with self._lock:
+            self.received.append(
+                (time.time(), int(request.match_info["channel_id"]), tx_hash))
+        return web.json_response({"id": str(len(self.received))})
+
+    async def _serve(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post("/channels/{channel_id}/messages", self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._ready.set()
+        await self._stop.wait()
+        await runner.cleanup()
+
+    def start(self):
+        threading.Thread(target=lambda: asyncio.run(self._serve()),
+                         name="soak-discord",
+                         daemon=True).start()
+        self._ready.wait(10)
+        return self
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.received)
+
+
+async def run_soak(collections=20,
+                   channels=5,
+                   rate=10.0,
+                   duration=60,
+                   block_time=1.0,
+                   poll_interval=1.0,
+                   discord_latency=0.05,
+                   rate_limit_every=0,
+                   drain_timeout=30):
+    """Generate `rate` sales/sec across `collections` collections for `duration` seconds.
+
+    Collection i posts to channel i % channels. Every sale goes through
+    AbstractAPI polling (over HTTP to the stub RPC), the sale embed renderer
+    and REST sends to the stub Discord. Digests go to a temporary store and
+    wallet labels to a resolver without a name service, but the process-wide
+    metrics still count the run: use run_soak_process from a live bot.
+
+    Returns:
+        dict: Traffic, throughput, latency percentiles, memory growth, drops and duplicates.
+    """
+    import aiohttp
+    from web3 import Web3
+    from utils.api_handler import AbstractAPI
+    from utils.digests import DigestStore
+    from utils.loop_monitor import LoopMonitor
+    from utils.replay import SyntheticChain
+    from utils.sales_posting import render_sale_embed
+    from utils.sharding import send_embed_rest
+    from utils.tracing import LogHistogram
+    from utils.wallet_labels import WalletLabelResolver
+
+    chain = SyntheticChain(head=1000, block_time=max(1, round(block_time)))
+    rpc = StubRPC(chain).start()
+    discord_stub = StubDiscord(discord_latency, rate_limit_every).start()
+
+    addresses = [
+        Web3.to_checksum_address("0x" + format(0x50A4 << 128 | i, "040x"))
+        for i in range(collections)
+    ]
+    channel_ids = [900_000 + j for j in range(channels)]
+    channel_of = {
+        address.lower(): channel_ids[i % channels]
+        for i, address in enumerate(addresses)
+    }
+    tracked = {
+        "abstract": {
+            address.lower(): {
+                "CA_or_ME": address.lower(),
+                "subscriptions": [{
+                    "guild_id": 0,
+                    "channel_id": channel_of[address.lower()],
+                    "sales_threshold": 1
+                }]
+            }
+            for address in addresses
+        }
+    }
+
+    session = aiohttp.ClientSession()
+
+    async def sink(sale):
+        embed = await render_sale_embed(sale["collection"], sale["token_id"],
+                                        sale["price"], sale["buyer"],
+                                        sale["seller"], sale["tx_hash"],
+                                        quantity=sale["quantity"],
+                                        buyer_label=sale["buyer_label"],
+                                        seller_label=sale["seller_label"])
+        embed_dict = embed.to_dict()
+        await asyncio.gather(*(send_embed_rest(session, channel_id, embed_dict,
+                                               discord_stub.url)
+                               for channel_id in sale["channel_ids"]))
+
+    tmp_dir = tempfile.mkdtemp(prefix="soak-")
+    api = AbstractAPI(sale_sink=sink,
+                      http_provider=Web3.HTTPProvider(rpc.url),
+                      tracked_collections=tracked,
+                      digest_store=DigestStore(
+                          os.path.join(tmp_dir, "digests.json")),
+                      label_resolver=WalletLabelResolver())
+    api.cursor = chain.head  # Live traffic only, no history
+
+    created = {}  # tx hash -> (created_at, channel_id)
+    generating = True
+
+    async def generate():
+        pending = 0.0
+        n = 0
+        while generating:
+            await asyncio.sleep(block_time)
+            pending += rate * block_time
+            with rpc.lock:
+                block = chain.head + 1
+                while pending >= 1:
+                    pending -= 1
+                    address = addresses[n % collections]
+                    tx_hash = "0x" + format(0x50A4 << 192 | n, "064x")
+                    chain.add_transfer(address, n, "0x" + "11" * 20,
+                                       "0x" + format(n + 1, "040x"), 10**16,
+                                       block, tx_hash)
+                    created[tx_hash] = (time.time(),
+                                        channel_of[address.lower()])
+                    n += 1
+                chain.head = block
+
+    async def poll():
+        while not api.stopping:
+            try:
+                await api.fallback_poll_sales()
+            except Exception as e:
+                logger.error(f"Soak poll failed: {str(e)}")
+            await api.wait_or_stop(poll_interval)
+
+    memory = [rss_bytes()]
+
+    async def sample_memory():
+        while True:
+            await asyncio.sleep(1)
+            memory.append(rss_bytes())
+
+    monitor = LoopMonitor(interval=0.05, threshold=3600)
+    monitor.start()
+    tasks = [
+        asyncio.create_task(generate()),
+        asyncio.create_task(poll()),
+        asyncio.create_task(sample_memory())
+    ]
+    started = time.time()
+    try:
+        await asyncio.sleep(duration)
+        generating = False
+        generated_in = time.time() - started
+        # Let the pipeline catch up with everything generated
+        drain_until = time.time() + drain_timeout
+        while time.time() < drain_until:
+            delivered = {tx for _, _, tx in discord_stub.snapshot()}
+            if len(delivered) >= len(created):
+                break
+            await asyncio.sleep(0.5)
+    finally:
+        api.stop()
+        monitor.stop()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await session.close()
+        discord_stub.stop()
+        rpc.stop()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    received = discord_stub.snapshot()
+    latency = LogHistogram()
+    seen = {}
+    for received_at, channel_id, tx_hash in received:
+        key = (channel_id, tx_hash)
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] == 1 and tx_hash in created:
+            latency.observe(received_at - created[tx_hash][0])
+    expected = {(channel_id, tx) for tx, (_, channel_id) in created.items()}
+    delivered = [key for key in seen if key in expected]
+    posts_done = [
+        received_at for received_at, channel_id, tx in received
+        if (channel_id, tx) in expected
+    ]
+    span = (max(posts_done) - started) if posts_done else generated_in
+    return {
+        "collections": collections,
+        "channels": channels,
+        "duration": round(generated_in, 1),
+        "sales_generated": len(created),
+        "posts_expected": len(expected),
+        "posts_delivered": len(delivered),
+        "dropped": len(expected) - len(delivered),
+        "duplicates": sum(count - 1 for count in seen.values()),
+        "unexpected": len([key for key in seen if key not in expected]),
+        "throughput_per_sec": round(len(delivered) / span, 2) if span else 0.0,
+        "latency_p50": _round(latency.quantile(0.5)),
+        "latency_p95": _round(latency.quantile(0.95)),
+        "latency_p99": _round(latency.quantile(0.99)),
+        "rss_start_mb": round(memory[0] / 1e6, 1),
+        "rss_end_mb": round(memory[-1] / 1e6, 1),
+        "rss_growth_mb": round((memory[-1] - memory[0]) / 1e6, 1),
+        "max_loop_lag_ms": round(monitor.max_lag * 1000, 1),
+        "rpc_calls": dict(chain.calls),
+        "discord_requests": discord_stub.requests,
+        "rate_limited": discord_stub.rate_limited,
+    }
+
+
+async def run_soak_process(collections=20, channels=5, rate=10.0, duration=60):
+    """Run a soak test in a child `python -m utils.soak --json` and return its report.
+
+    Raises:
+        RuntimeError: If the child exits with an error or prints no report.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "utils.soak", "--collections", str(collections),
+        "--channels", str(channels), "--rate", str(rate), "--duration",
+        str(duration), "--json",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE)
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        raise
+    lines = stdout.decode(errors="replace").splitlines()
+    starts = [i for i, line in enumerate(lines) if line == "{"]  # config prints come first
+    if process.returncode or not starts:
+        error = stderr.decode(errors="replace").strip().splitlines()
+        raise RuntimeError(error[-1] if error else
+                           f"soak process exited with {process.returncode}")
+    return json.loads("\n".join(lines[starts[-1]:]))
+
+
+def format_report(report):
+    """Human-readable summary of a run_soak() report."""
+
+    def ms(seconds):
+        return "n/a" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+    healthy = not report["dropped"] and not report["duplicates"]
+    return "\n".join([
+        f"{'✅' if healthy else '⚠️'} Soak test: {report['collections']} collections → {report['channels']} channels "
+        f"for {report['duration']:.0f}s",
+        f"Sales generated: {report['sales_generated']} · Posts delivered: {report['posts_delivered']}/{report['posts_expected']} "
+        f"· Dropped: {report['dropped']} · Duplicates: {report['duplicates']}",
+        f"Throughput: {report['throughput_per_sec']} posts/s · Latency p50 {ms(report['latency_p50'])}, "
+        f"p95 {ms(report['latency_p95'])}, p99 {ms(report['latency_p99'])}",
+        f"Memory: {report['rss_start_mb']} → {report['rss_end_mb']} MB ({report['rss_growth_mb']:+} MB) "
+        f"· Max loop lag: {report['max_loop_lag_ms']}ms",
+        f"RPC calls: {sum(report['rpc_calls'].values())} · Discord requests: {report['discord_requests']} "
+        f"({report['rate_limited']} rate-limited)",
+    ])
+
+
+if __name__ == "__main__":
+    from utils.logging_setup import setup_logging
+
+    parser = argparse.ArgumentParser(
+        description="Soak test the sales pipeline against local stubs")
+    parser.add_argument("--collections", type=int, default=20)
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="Sales per second")
+    parser.add_argument("--duration", type=int, default=60,
+                        help="Seconds of traffic")
+    parser.add_argument("--block-time", type=float, default=1.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--discord-latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit-every", type=int, default=0,
+                        help="Answer every Nth Discord request with a 429")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    setup_logging(None, console=False)  # Keep synthetic sales out of bot.log
+    report = asyncio.run(
+        run_soak(args.collections, args.channels, args.rate, args.duration,
+                 args.block_time, args.poll_interval, args.discord_latency,
+                 args.rate_limit_every))
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv('STARTUP_PROFILE', '0') == '1'
+
+_start = time.perf_counter()
+import_times = {}  # module name -> seconds spent executing it (inclusive)
+phases = []  # (label, seconds since process start, duration or None)
+_marked = set()
+
+
+class _TimedLoader:
+    """Wraps a module loader to time exec_module."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            import_times[module.__name__] = time.perf_counter() - started
+
+
+class _TimingFinder:
+    """Meta path finder that delegates lookup and times every module it loads."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader,
+                                                       "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+def install():
+    """Start timing imports. No-op unless STARTUP_PROFILE=1."""
+    if ENABLED and not any(
+            isinstance(f, _TimingFinder) for f in sys.meta_path):
+        sys.meta_path.insert(0, _TimingFinder())
+
+
+def mark(label):
+    """Record a startup milestone once (e.g. 'gateway ready')."""
+    if not ENABLED or label in _marked:
+        return
+    _marked.add(label)
+    elapsed = time.perf_counter() - _start
+    phases.append((label, elapsed, None))
+    logger.info(f"[startup] {label} at {elapsed * 1000:.0f}ms")
+
+
+class timed:
+    """Context manager recording how long an initialization step took."""
+
+    def __init__(self, label):
+        self.label = label
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED:
+            finished = time.perf_counter()
+            phases.append(
+                (self.label, finished - _start, finished - self.started))
+        return False
+
+
+def report(top=15):
+    """Return a text report of the slowest top-level imports and the startup milestones."""
+    if not ENABLED:
+        return ""
+    lines = ["Startup profile:", "  Slowest imports (inclusive):"]
+    top_level = {
+        name: seconds
+        for name, seconds in import_times.items()
+        if "." not in name or name.startswith(("utils.", "commands."))
+    }
+    for name, seconds in sorted(top_level.items(),
+                                key=lambda item: item[1],
+                                reverse=True)[:top]:
+        lines.append(f"    {seconds * 1000:8.1f}ms  {name}")
+    lines.append("  Milestones:")
+    for label, seconds, duration in phases:
+        took = f" (took {duration * 1000:.1f}ms)" if duration is not None else ""
+        lines.append(f"    {seconds * 1000:8.1f}ms  {label}{took}")
+    return "\n".join(lines)
@@ -0,0 +1,159 @@
+import json
+import os
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = "./data/tracked_collections.json"
+lock = asyncio.Lock()  # Shared by every cog that edits DATA_FILE
+
+
+def empty_collections():
+    """Return the default structure of the tracked collections file."""
+    return {"abstract": {}}
+
+
+def load_tracked_collections(get_channel=None):
+    """Load tracked collections from JSON, migrating legacy single-channel entries.
+
+    Args:
+        get_channel: Optional bot.get_channel, used to fill in the guild of legacy subscriptions.
+
+    Returns:
+        dict: {"abstract": {collection_address: {"CA_or_ME": ..., "subscriptions": [...]}}}
+    """
+    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
+    if not os.path.exists(DATA_FILE):
+        return empty_collections()
+    try:
+        with open(DATA_FILE, "r") as f:
+            content = f.read().strip()
+        tracked_collections = json.loads(content) if content else empty_collections()
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid JSON in {DATA_FILE}: {e}")
+        return empty_collections()
+
+    tracked_collections.setdefault("abstract", {})
+    for collection_address, entry in tracked_collections["abstract"].items():
+        migrate_entry(collection_address, entry, get_channel)
+    return tracked_collections
+
+
+def save_tracked_collections(tracked_collections):
+    """Write tracked collections back to disk."""
+    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
+    with open(DATA_FILE, "w") as f:
+        json.dump(tracked_collections, f, indent=4)
+
+
+def migrate_entry(collection_address, entry, get_channel=None):
+    """Convert a legacy {"channel_id", "sales_threshold"} entry to a subscription list in place.
+
+    Legacy entries carry no guild; with get_channel it is resolved from the
+    channel, otherwise it stays None until a later load can resolve it.
+    """
+    entry.setdefault("CA_or_ME", collection_address)
+    subscriptions = entry.setdefault("subscriptions", [])
+    if "channel_id" in entry:
+        channel_id = entry.pop("channel_id")
+        sales_threshold = entry.pop("sales_threshold", 1)
+        if channel_id and not any(
+                s["channel_id"] == channel_id for s in subscriptions):
+            subscriptions.append({
+                "guild_id": None,
+                "channel_id": channel_id,
+                "sales_threshold": sales_threshold
+            })
+    if get_channel is not None:
+        for subscription in subscriptions:
+            if subscription.get("guild_id") is None:
+                channel = get_channel(subscription["channel_id"])
+                guild = getattr(channel, "guild", None)
+                if guild is not None:
+                    subscription["guild_id"] = guild.id
+    return entry
+
+
+def get_subscriptions(entry):
+    """Return the subscription list of a collection entry."""
+    return entry.get("subscriptions", [])
+
+
+def get_channel_ids(entry):
+    """Return the distinct channel IDs subscribed to a collection entry."""
+    return list(dict.fromkeys(s["channel_id"] for s in get_subscriptions(entry)))
+
+
+def add_subscription(tracked_collections, collection_address, guild_id,
+                     channel_id, sales_threshold=1):
+    """Subscribe a channel to a collection.
+
+    Returns:
+        bool: False if the channel was already subscribed, True otherwise.
+    """
+    collections = tracked_collections.setdefault("abstract", {})
+    entry = collections.setdefault(collection_address, {
+        "CA_or_ME": collection_address,
+        "subscriptions": []
+    })
+    migrate_entry(collection_address, entry)
+    if any(s["channel_id"] == channel_id for s in entry["subscriptions"]):
+        return False
+    entry["subscriptions"].append({
+        "guild_id": guild_id,
+        "channel_id": channel_id,
+        "sales_threshold": sales_threshold
+    })
+    return True
+
+
+def set_digest(tracked_collections, collection_address, channel_id,
+               frequency):
+    """Set a subscribed channel's digest frequency ("daily", "weekly" or None to stop).
+
+    Returns:
+        bool: False if the channel does not track the collection.
+    """
+    entry = tracked_collections.get("abstract", {}).get(collection_address)
+    if entry is None:
+        return False
+    for subscription in get_subscriptions(entry):
+        if subscription["channel_id"] == channel_id:
+            if frequency:
+                subscription["digest"] = frequency
+            else:
+                subscription.pop("digest", None)
+            return True
+    return False
+
+
+def remove_subscription(tracked_collections, collection_address,
+                        channel_id=None, guild_id=None):
+    """Unsubscribe channels from a collection.
+
+    With channel_id, only that channel is removed. Otherwise every subscription
+    of guild_id is removed; a None guild_id matches nothing, so legacy entries
+    whose guild is unknown can only be removed by channel. The collection
+    entry is dropped once nothing subscribes to it.
+
+    Returns:
+        int: Number of subscriptions removed.
+    """
+    collections = tracked_collections.get("abstract", {})
+    entry = collections.get(collection_address)
+    if entry is None:
+        return 0
+    migrate_entry(collection_address, entry)
+
+    def matches(subscription):
+        if channel_id is not None:
+            return subscription["channel_id"] == channel_id
+        return guild_id is not None and subscription.get("guild_id") == guild_id
+
+    kept = [s for s in entry["subscriptions"] if not matches(s)]
+    removed = len(entry["subscriptions"]) - len(kept)
+    entry["subscriptions"] = kept
+    if not kept:
+        del collections[collection_address]
+    return removed
@@ -0,0 +1,9 @@
+# keccak256 event signatures, precomputed so callers don't need web3 at import time
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"  # Transfer(address,address,uint256)
+TRANSFER_SINGLE_TOPIC = "0xc3d58168c5ae7397731d063d5bbf3d657854427343f4c083240f7aacaa2d0f62"  # TransferSingle(address,address,address,uint256,uint256)
+TRANSFER_BATCH_TOPIC = "0x4a39dc06d4c0dbc64b70af90fd698a233a518aa5d07e595d983b8c0526c8f7fb"  # TransferBatch(address,address,address,uint256[],uint256[])
+
+# Every topic0 that moves an NFT (ERC-721 and ERC-1155), OR-ed into one log filter
+NFT_TRANSFER_TOPICS = [
+    TRANSFER_TOPIC, TRANSFER_SINGLE_TOPIC, TRANSFER_BATCH_TOPIC
+]
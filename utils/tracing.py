@@ -0,0 +1,112 @@
+import math
+import time
+from array import array
+from collections import deque
+
+from utils import metrics
+
+# Timestamps every sale carries, in pipeline order
+STAGES = ("block", "received", "classified", "enriched", "rendered", "sent")
+
+# Latency between consecutive stamps, named after what the time was spent on
+SPANS = (
+    ("chain", "block", "received"),  # Block production until our RPC returned the log
+    ("classify", "received", "classified"),  # get_transaction and sale checks
+    ("enrich", "classified", "enriched"),  # Collection name / metadata
+    ("render", "enriched", "rendered"),  # Building the embed
+    ("discord", "rendered", "sent"),  # Send until Discord acknowledged every channel
+    ("total", "block", "sent"),
+)
+
+
+class SaleTrace:
+    """Wall-clock timestamps of one sale as it moves through the pipeline."""
+
+    __slots__ = ("collection", "token_id", "stamps")
+
+    def __init__(self, collection=None, token_id=None, received_at=None):
+        self.collection = collection
+        self.token_id = token_id
+        self.stamps = {}
+        if received_at is not None:
+            self.stamps["received"] = received_at
+
+    def mark(self, stage, at=None):
+        self.stamps[stage] = time.time() if at is None else at
+
+    def spans(self):
+        """Return {span name: seconds} for every span whose both stamps are set."""
+        result = {}
+        for name, start, end in SPANS:
+            if start in self.stamps and end in self.stamps:
+                result[name] = max(0.0, self.stamps[end] - self.stamps[start])
+        return result
+
+    def to_dict(self):
+        return dict(self.stamps)
+
+    @classmethod
+    def from_dict(cls, stamps, collection=None, token_id=None):
+        trace = cls(collection, token_id)
+        trace.stamps.update(stamps or {})
+        return trace
+
+
+class LogHistogram:
+    """Fixed-size histogram with logarithmic buckets (within 10% of the true value).
+
+    Covers 1ms to about 2 hours in a few hundred integer counters, so per-stage
+    percentiles cost the same memory no matter how many sales are recorded.
+    """
+
+    def __init__(self, min_value=0.001, max_value=7200.0, growth=1.1):
+        self.min_value = min_value
+        self.log_growth = math.log(growth)
+        self.size = int(math.log(max_value / min_value) / self.log_growth) + 2
+        self.counts = array("L", [0]) * self.size
+        self.count = 0
+
+    def _index(self, value):
+        if value <= self.min_value:
+            return 0
+        return min(self.size - 1,
+                   int(math.log(value / self.min_value) / self.log_growth) + 1)
+
+    def _upper_bound(self, index):
+        return self.min_value * math.exp(self.log_growth * index)
+
+    def observe(self, value):
+        self.counts[self._index(value)] += 1
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._upper_bound(index)
+        return self._upper_bound(self.size - 1)
+
+
+span_histograms = {name: LogHistogram() for name, _, _ in SPANS}
+recent_traces = deque(maxlen=20)
+
+
+def record(trace):
+    """Aggregate a finished trace into the per-span histograms."""
+    for name, seconds in trace.spans().items():
+        span_histograms[name].observe(seconds)
+        metrics.SALE_STAGE_SECONDS.labels(name).observe(seconds)
+    recent_traces.append(trace)
+
+
+def percentiles(quantiles=(0.5, 0.95, 0.99)):
+    """Return {span name: (count, [quantile values])} for spans with data."""
+    return {
+        name: (histogram.count,
+               [histogram.quantile(q) for q in quantiles])
+        for name, histogram in span_histograms.items() if histogram.count
+    }
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import time
+import logging
+from collections import OrderedDict
+
+import config
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+LABELS_FILE = "./data/wallet_labels.json"  # {"0xaddress": "label"}, user-provided
+
+# Addresses with a fixed meaning; add marketplace contracts here as they are confirmed
+KNOWN_LABELS = {
+    bytes(20): "Mint",  # Tokens transferred from the zero address are mints
+}
+
+NAME_SELECTOR = "0x691f3431"  # name(bytes32): ENS-style reverse resolver
+
+
+def _address_bytes(address):
+    return bytes.fromhex(address[2:] if address.startswith("0x") else address)
+
+
+def reverse_node(address):
+    """ENS namehash of '<address hex>.addr.reverse' for a 20-byte address."""
+    from eth_utils import keccak
+
+    node = bytes(32)
+    for label in reversed([address.hex(), "addr", "reverse"]):
+        node = keccak(node + keccak(text=label))
+    return node
+
+
+def decode_abi_string(result):
+    """Decode an ABI-encoded `string` return value; empty or malformed gives None."""
+    data = bytes.fromhex(result[2:]) if result and result != "0x" else b""
+    if len(data) < 64:
+        return None
+    offset = int.from_bytes(data[:32], "big")
+    length = int.from_bytes(data[offset:offset + 32], "big")
+    text = data[offset + 32:offset + 32 + length].decode("utf-8",
+                                                          errors="replace")
+    return text or None
+
+
+class LabelCache:
+    """LRU of address -> label, where a None label is a cached miss.
+
+    Misses expire sooner than hits so a wallet that registers a name is picked
+    up without restarting, while bots and whales trading all day are looked
+    up once per TTL.
+    """
+
+    def __init__(self, capacity=10000, ttl=3600, negative_ttl=600):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # address -> (label, expires_at)
+
+    def get(self, address):
+        """Return (hit, label)."""
+        entry = self._entries.get(address)
+        if entry is None:
+            return False, None
+        label, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[address]
+            return False, None
+        self._entries.move_to_end(address)
+        return True, label
+
+    def put(self, address, label):
+        ttl = self.ttl if label else self.negative_ttl
+        self._entries[address] = (label, time.monotonic() + ttl)
+        self._entries.move_to_end(address)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class WalletLabelResolver:
+    """Resolves wallets to display labels: user labels, known addresses, then a name service.
+
+    Name-service lookups go through a LabelCache (including misses), are
+    coalesced when the same wallet is already being looked up, and are sent as
+    one JSON-RPC batch per `batch_window` for up to `max_batch` wallets.
+    """
+
+    def __init__(self,
+                 labels=None,
+                 reverse_resolver=None,
+                 rpc_url=None,
+                 cache=None,
+                 batch_window=0.01,
+                 max_batch=100):
+        self.labels = dict(KNOWN_LABELS)
+        self.labels.update(labels or {})
+        self.reverse_resolver = reverse_resolver
+        self.rpc_url = rpc_url or config.ABSTRACT_HTTP_RPC
+        self.cache = cache if cache is not None else LabelCache()
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.lookups = 0  # Wallets sent to the name service
+        self.batches = 0  # JSON-RPC batches sent
+        self._inflight = {}  # address -> future shared by concurrent lookups
+        self._queue = []  # Addresses waiting for the next batch
+        self._flush_handle = None
+        self._tasks = set()  # Running lookups, referenced so they are not garbage-collected
+
+    @classmethod
+    def from_file(cls, path=LABELS_FILE, **kwargs):
+        labels = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    labels = {
+                        _address_bytes(address.lower()): label
+                        for address, label in json.load(f).items()
+                    }
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load wallet labels from {path}: {e}")
+        return cls(labels, **kwargs)
+
+    def cached(self, address):
+        """Return (known, label) without any I/O; label is None for a known miss."""
+        label = self.labels.get(address)
+        if label:
+            return True, label
+        if not self.reverse_resolver:
+            return True, None
+        return self.cache.get(address)
+
+    def label(self, address):
+        """Label for display if already resolved, else None. Never waits."""
+        return self.cached(address)[1]
+
+    def start(self, *addresses):
+        """Begin resolving the addresses not yet known.
+
+        Returns:
+            asyncio.Task or None: None when every address is already resolved.
+        """
+        missing = [a for a in dict.fromkeys(addresses) if not self.cached(a)[0]]
+        if not missing:
+            return None
+        return self._spawn(self.resolve_many(missing))
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def resolve_many(self, addresses):
+        """Resolve several wallets, batching name-service lookups.
+
+        Returns:
+            dict: address -> label or None.
+        """
+        results = {}
+        waiting = {}
+        for address in dict.fromkeys(addresses):
+            known, label = self.cached(address)
+            if known:
+                results[address] = label
+            else:
+                waiting[address] = self._enqueue(address)
+        if waiting:
+            labels = await asyncio.gather(*waiting.values())
+            results.update(zip(waiting, labels))
+        return results
+
+    def _enqueue(self, address):
+        future = self._inflight.get(address)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = self._inflight[address] = loop.create_future()
+        self._queue.append(address)
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._queue = self._queue, []
+        if batch:
+            self._spawn(self._lookup_batch(batch))
+
+    async def _lookup_batch(self, addresses):
+        import aiohttp
+
+        payload = [{
+            "jsonrpc": "2.0",
+            "id": i,
+            "method": "eth_call",
+            "params": [{
+                "to": self.reverse_resolver,
+                "data": NAME_SELECTOR + reverse_node(address).hex()
+            }, "latest"]
+        } for i, address in enumerate(addresses)]
+        self.lookups += len(addresses)
+        self.batches += 1
+        labels = {}
+        try:
+            with metrics.RPC_SECONDS.labels("eth_call", "names").time():
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(
+                            self.rpc_url,
+                            json=payload,
+                            timeout=aiohttp.ClientTimeout(total=5)) as response:
+                        replies = await response.json(content_type=None)
+            metrics.RPC_CALLS.labels("eth_call", "names").inc(len(addresses))
+            for reply in replies if isinstance(replies, list) else []:
+                address = addresses[reply["id"]]
+                labels[address] = decode_abi_string(reply.get("result"))
+                self.cache.put(address, labels[address])
+        except Exception as e:
+            # Not cached: a failed lookup is retried on the wallet's next sale
+            metrics.RPC_ERRORS.labels("eth_call", "names").inc(len(addresses))
+            logger.debug(f"Name lookup for {len(addresses)} wallets failed: {str(e)}")
+        for address in addresses:
+            future = self._inflight.pop(address, None)
+            if future is not None and not future.done():
+                future.set_result(labels.get(address))
+
+
+_resolver = None
+
+
+def get_resolver():
+    global _resolver
+    if _resolver is None:
+        _resolver = WalletLabelResolver.from_file(
+            reverse_resolver=config.NAME_SERVICE_RESOLVER,
+            cache=LabelCache(config.LABEL_CACHE_SIZE))
+    return _resolver